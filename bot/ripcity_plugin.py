@@ -31,3 +31,20 @@ class Plugin:
             return
         
         yield 'Plugin reloaded successfully'
+
+    @command(permission='admin')
+    def metrics(self, mask, target, args):
+        """metrics
+
+            %%metrics
+            [-metrics] to show command latency, upstream calls and cache stats
+        """
+        try:
+            scores = self.bot.get_plugin('scores_plugin.Plugin')
+        except LookupError as e:
+            yield str(e)
+            return
+
+        # the summaries grow with every command and endpoint seen, the
+        # outbox splits them into lines that fit
+        scores.outbox.reply(mask, target, scores.metrics_summary())
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Per command latency benchmark against recorded fixtures.
+
+Record fixtures first (``fixtures = record`` in the bot config, then run the
+commands in a channel), then:
+
+    python scores_bench.py --fixtures fixtures --date 11/23/2021
+    python scores_bench.py --fixtures fixtures --date 11/23/2021 --save bench_baseline.json
+    python scores_bench.py --fixtures fixtures --date 11/23/2021 --baseline bench_baseline.json
+
+Every command runs once cold (empty cache and live snapshot, though the
+HistoryStore is kept) and ``--runs`` times warm. Wall time, upstream calls
+and peak allocations are reported per command, and with ``--baseline`` any
+command slower than ``--threshold`` times its baseline is flagged and the
+exit status is 1. ``--profile`` prints the top functions by cumulative time
+for each command.
+"""
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import docopt
+
+import scores_live
+import scores_plugin
+from scores_fixtures import FIXTURES_DIR, FixtureMissing
+from scores_ratelimit import UpstreamBusy
+
+COMMANDS = [
+    'player dame',
+    'career dame',
+    'seasonstats -s 2020 dame',
+    'seasonranks dame',
+    'stats dame',
+    'stats -l 10 dame',
+    'scores',
+    'standings',
+    'winchance blazers',
+    'playbyplay blazers',
+    'record blazers',
+    'lottery',
+    'roster blazers',
+    'headtohead blazers lakers',
+    'compare dame, steph, luka',
+    'leaders pts',
+    'leaders ast -s 2020',
+]
+
+
+class BenchBot:
+    """Just enough of irc3's bot for Plugin to load."""
+
+    def __init__(self, config):
+        self.config = {'scores_plugin': config}
+        self.loop = asyncio.new_event_loop()
+
+
+def parse(plugin, line):
+    """docopt args for a command line, the way irc3 builds them."""
+    name, *argv = line.split()
+    meth = getattr(type(plugin), name)
+    doc = [line.strip() for line in meth.__doc__.strip().split('\n')]
+    usage = 'Usage:\n    ' + '\n    '.join(
+        'bench ' + line.strip('%%') for line in doc if line.startswith('%%'))
+    return meth.__wrapped__, docopt.docopt(usage, [name] + argv, help=False)
+
+
+def reset(plugin):
+    """Forget everything warm, short of the on disk store."""
+    plugin.cache.clear()
+    plugin.live._snapshot = None
+    plugin.pbp_trackers.clear()
+    plugin.wp_trackers.clear()
+
+
+def run(plugin, line, trace=False, profile=False):
+    meth, args = parse(plugin, line)
+    calls = plugin.upstream.calls
+    profiler = cProfile.Profile() if profile else None
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        replies = list(meth(plugin, None, None, args))
+    except FixtureMissing as e:
+        replies = [f"fixture missing: {e}"]
+    except UpstreamBusy as e:
+        replies = [str(e)]
+    if profiler:
+        profiler.disable()
+    elapsed = time.perf_counter() - start
+    result = {
+        'wall_ms': round(elapsed * 1000, 3),
+        'upstream_calls': plugin.upstream.calls - calls,
+        'replies': replies,
+    }
+    if trace:
+        result['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+    if profiler:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(12)
+        result['profile'] = out.getvalue()
+    return result
+
+
+def bench(fixtures, commands, runs, latency=0, profile=False):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            'fixtures': 'replay',
+            'fixtures_dir': fixtures,
+            'fixtures_latency': str(latency),
+            'store': os.path.join(tmp, 'bench.db'),
+            # measure the commands, not the outbound pacing or the breaker
+            'rate_stats': '1000', 'burst_stats': '1000',
+            'rate_live': '1000', 'burst_live': '1000',
+            'breaker_failures': '1000000',
+        }
+        plugin = scores_plugin.Plugin(BenchBot(config))
+        for line in commands:
+            try:
+                parse(plugin, line)
+            except docopt.DocoptExit:
+                print(f"skipping {line!r}: doesn't match the command's usage", file=sys.stderr)
+                continue
+            reset(plugin)
+            cold = run(plugin, line, profile=profile)
+            # tracemalloc slows everything down, so peak memory gets its own run
+            reset(plugin)
+            cold['peak_kb'] = run(plugin, line, trace=True)['peak_kb']
+            warm = [run(plugin, line) for _ in range(runs)]
+            results[line] = {
+                'cold': cold,
+                'warm_ms': round(min(r['wall_ms'] for r in warm), 3) if warm else None,
+                'warm_upstream_calls': max(r['upstream_calls'] for r in warm) if warm else None,
+            }
+        plugin.shutdown()
+    return results
+
+
+def report(results, baseline=None, threshold=1.5):
+    regressions = []
+    print(f"{'command':32} {'cold ms':>10} {'calls':>6} {'peak kb':>9} {'warm ms':>9} {'calls':>6}")
+    for line, result in results.items():
+        cold = result['cold']
+        flag = ''
+        if baseline and line in baseline:
+            before = baseline[line]['cold']['wall_ms']
+            if before and cold['wall_ms'] > before * threshold:
+                flag = f"  REGRESSION (was {before} ms)"
+                regressions.append(line)
+        print(f"{line:32} {cold['wall_ms']:>10} {cold['upstream_calls']:>6} {cold['peak_kb']:>9} "
+              f"{result['warm_ms']!s:>9} {result['warm_upstream_calls']!s:>6}{flag}")
+        if 'profile' in cold:
+            print(cold['profile'])
+    return regressions
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description="Benchmark scores_plugin commands")
+    args.add_argument('--fixtures', default=FIXTURES_DIR)
+    args.add_argument('--date', help="MM/DD/YYYY the fixtures were recorded on")
+    args.add_argument('--command', action='append', help="command line to run, repeatable")
+    args.add_argument('--runs', type=int, default=5, help="warm runs per command")
+    args.add_argument('--latency', type=float, default=0, help="seconds added to each upstream call")
+    args.add_argument('--save', help="write results as a baseline file")
+    args.add_argument('--baseline', help="compare against a baseline file")
+    args.add_argument('--threshold', type=float, default=1.5)
+    args.add_argument('--profile', action='store_true')
+    args = args.parse_args()
+
+    if args.date:
+        # today's scoreboard has to be the one that was recorded
+        scores_live.pacific_today = scores_plugin.pacific_today = lambda: args.date
+
+    results = bench(args.fixtures, args.command or COMMANDS, args.runs, args.latency, args.profile)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        for result in results.values():
+            result['cold'].pop('profile', None)
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+    sys.exit(1 if regressions else 0)
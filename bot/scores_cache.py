@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+import importlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from scores_upstream import Upstream
+
+MISSING = object()
+
+# seconds to keep a response for, by endpoint class name
+DEFAULT_TTLS = {
+    'BoxScore': 10,
+    'CommonPlayerInfo': 6 * 60 * 60,
+    'CommonTeamRoster': 60 * 60,
+    'LeagueDashPlayerStats': 24 * 60 * 60,  # -leaders, refreshed daily
+    'LeagueGameFinder': 10 * 60,
+    'LeagueStandings': 60 * 60,  # dropped early by StandingsModel when a game ends
+    'PlayByPlay': 5,
+    'PlayerCareerStats': 60 * 60,
+    'PlayerGameLogs': 2 * 60,
+    'ScoreBoard': 10,
+    'Scoreboard': 30,
+    'TeamDetails': 24 * 60 * 60,
+    'TeamGameLog': 5 * 60,
+    'TeamGameLogs': 5 * 60,
+    'WinProbabilityPBP': 10,
+}
+DEFAULT_TTL = 60
+HISTORICAL_TTL = 7 * 24 * 60 * 60  # anything from a completed season
+
+SEASON_PARAMS = ('season', 'season_nullable')
+
+
+_stale = threading.local()
+
+
+def note_stale(age):
+    """Record that a response ``age`` seconds old was served on this thread."""
+    _stale.age = max(age, getattr(_stale, 'age', None) or 0)
+
+
+def take_stale():
+    """Age of the oldest stale response served on this thread since the last
+    call, or None."""
+    age = getattr(_stale, 'age', None)
+    _stale.age = None
+    return age
+
+
+class TTLCache:
+    """Size bounded LRU cache where every entry carries its own expiry.
+
+    Expired entries stay around (until the LRU pushes them out) as the last
+    known good value, for ``get_stale`` when upstream is down.
+    """
+
+    def __init__(self, maxsize=1024, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.stale = 0
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires, _, value = entry
+            if expires < self.clock():
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = self.clock()
+            self._data[key] = (now + ttl, now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_fetch(self, key, fetch, ttl):
+        """Return the cached value for key, fetching it on a miss.
+
+        Concurrent misses for the same key are coalesced: the first caller
+        runs fetch and everyone else waits on its result (or its exception).
+        """
+        with self._lock:
+            value = self.get(key)
+            if value is not MISSING:
+                return value
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = self._inflight[key] = Future()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            return inflight.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        else:
+            self.set(key, value, ttl)
+            inflight.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def get_stale(self, key):
+        """(value, age in seconds) of an expired entry, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            now = self.clock()
+            if entry is None or entry[0] >= now:
+                return None
+            self.stale += 1
+            return entry[2], now - entry[1]
+
+    def invalidate(self, key):
+        # expire rather than drop, it's still the last known good value
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data[key] = (float('-inf'),) + entry[1:]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'coalesced': self.coalesced,
+            'stale': self.stale,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+        }
+
+
+class TTLPolicy:
+    """Decides how long a response may be cached.
+
+    Anything asking for a season before the current one, or about a
+    retired player, is finished: it gets HISTORICAL_TTL and may be kept in the
+    HistoryStore. Per endpoint values can be overridden from the bot config
+    with ``ttl_<endpoint> = seconds`` (endpoint lowercased).
+    """
+
+    def __init__(self, current_season, config=None, retired_players=()):
+        self.current_season = current_season
+        self.retired_players = frozenset(retired_players)
+        self.ttls = dict(DEFAULT_TTLS)
+        self.historical_ttl = HISTORICAL_TTL
+        config = config or {}
+        for name in self.ttls:
+            value = config.get(f"ttl_{name.lower()}")
+            if value:
+                self.ttls[name] = int(value)
+        if config.get('ttl_historical'):
+            self.historical_ttl = int(config['ttl_historical'])
+
+    def is_historical(self, params):
+        for param in SEASON_PARAMS:
+            season = params.get(param)
+            # later seasons are still being played (or haven't started)
+            if season and season[:4] < self.current_season[:4]:
+                return True
+        return params.get('player_id') in self.retired_players
+
+    def ttl_for(self, name, params):
+        if self.is_historical(params):
+            return self.historical_ttl
+        return self.ttls.get(name, DEFAULT_TTL)
+
+
+def cache_key(name, params):
+    return (name,) + tuple(sorted(params.items()))
+
+
+def params_json(params):
+    """Stable text form of endpoint parameters, for keys that leave memory."""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def rehydrate(endpoint, params, body):
+    """Build an endpoint instance from a response body fetched earlier."""
+    if endpoint.__module__.startswith('nba_api.live'):
+        from nba_api.live.nba.library.http import NBALiveHTTP as http
+    else:
+        from nba_api.stats.library.http import NBAStatsHTTP as http
+    result = endpoint(get_request=False, **params)
+    result.nba_response = http.nba_response(response=body, status_code=200, url=None)
+    result.load_response()
+    return result
+
+
+class CachedEndpoint:
+    """Callable standing in for an nba_api endpoint class.
+
+    Endpoint instances hit the network when constructed, so the constructed
+    instance is what gets cached; call sites keep using ``get_dict()`` and
+    ``get_normalized_dict()`` on it as before. Historical responses are
+    looked up in the store before going upstream.
+
+    While the host's circuit breaker is open, or when a fetch fails, the last
+    good response is served instead and its age noted for the reply (see
+    ``take_stale``). Once the breaker is ready for a trial request the
+    response is refreshed on ``upstream.background``.
+    """
+
+    def __init__(self, endpoint, cache, policy, store=None, upstream=None):
+        self.endpoint = endpoint
+        self.name = endpoint.__name__
+        self.cache = cache
+        self.policy = policy
+        self.store = store
+        self.upstream = upstream or Upstream()
+
+    def __call__(self, **params):
+        key = cache_key(self.name, params)
+        ttl = self.policy.ttl_for(self.name, params)
+        breaker = self.upstream.breaker(self.endpoint)
+        if breaker is not None and breaker.is_open():
+            stale = self.cache.get_stale(key)
+            if stale is not None:
+                if breaker.due() and self.upstream.background is not None:
+                    self.upstream.background.submit(self._revalidate, key, params, ttl)
+                return self._serve_stale(stale)
+        try:
+            return self.cache.get_or_fetch(key, lambda: self._fetch(params), ttl)
+        except Exception:
+            stale = self.cache.get_stale(key)
+            if stale is None:
+                raise
+            return self._serve_stale(stale)
+
+    @staticmethod
+    def _serve_stale(stale):
+        value, age = stale
+        note_stale(age)
+        return value
+
+    def _revalidate(self, key, params, ttl):
+        try:
+            self.cache.set(key, self._fetch(params), ttl)
+        except Exception:
+            pass  # the breaker has counted it, stale is served a while longer
+
+    def _fetch(self, params):
+        if self.store is None or not self.policy.is_historical(params):
+            return self.upstream.fetch(self.endpoint, params)
+        body = self.store.get(self.name, params)
+        if body is not None:
+            return rehydrate(self.endpoint, params, body)
+        result = self.upstream.fetch(self.endpoint, params)
+        self.store.put(self.name, params, result.get_response())
+        return result
+
+    def uncached(self, **params):
+        """Straight to upstream, for callers that keep the result themselves."""
+        return self.upstream.fetch(self.endpoint, params)
+
+    def warm(self, ttl=None, **params):
+        """Fetch into the cache ahead of the command that will ask for it,
+        kept for ``ttl`` seconds instead of the endpoint's usual TTL."""
+        value = self._fetch(params)
+        self.cache.set(cache_key(self.name, params), value,
+                       ttl or self.policy.ttl_for(self.name, params))
+        return value
+
+    def invalidate(self, **params):
+        self.cache.invalidate(cache_key(self.name, params))
+
+    def fresh(self, **params):
+        """Skip whatever is cached and fetch again, for pollers."""
+        self.invalidate(**params)
+        return self(**params)
+
+
+class CachedModule:
+    """Wraps an nba_api endpoint module so every endpoint class in it is
+    served through the shared cache. ``module`` may be a dotted name, which is
+    imported on first use."""
+
+    def __init__(self, module, cache, policy, store=None, upstream=None):
+        self._module = module
+        self._cache = cache
+        self._policy = policy
+        self._store = store
+        self._upstream = upstream
+        self._endpoints = {}
+
+    def __getattr__(self, name):
+        if isinstance(self._module, str):
+            self._module = importlib.import_module(self._module)
+        attr = getattr(self._module, name)
+        if not isinstance(attr, type):
+            return attr
+        if name not in self._endpoints:
+            self._endpoints[name] = CachedEndpoint(
+                attr, self._cache, self._policy, self._store, self._upstream)
+        return self._endpoints[name]
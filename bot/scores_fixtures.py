@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Record and replay upstream responses.
+
+With ``fixtures = record`` in the [scores_plugin] config every response the
+plugin fetches is also written to ``fixtures_dir``. With ``fixtures = replay``
+the plugin never goes upstream and answers from those files instead, with
+``fixtures_latency`` seconds of delay and ``fixtures_error_rate`` of requests
+failing as if stats.nba.com timed out. Record against an empty ``store``,
+since responses already in the HistoryStore are never fetched.
+
+The same files can be served over HTTP to exercise nba_api's own request
+path; point ``stats_base_url`` / ``live_base_url`` at the server:
+
+    python scores_fixtures.py fixtures --port 8080 --latency 0.2 --error-rate 0.05
+
+    stats_base_url = http://localhost:8080/stats/{endpoint}
+    live_base_url = http://localhost:8080/static/json/liveData/{endpoint}
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from scores_cache import params_json, rehydrate
+from scores_upstream import Upstream
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class FixtureMissing(LookupError):
+    pass
+
+
+def fixture_path(directory, name, params):
+    digest = hashlib.sha1(params_json(params).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(directory, f"{name}-{digest}.json")
+
+
+def load_fixtures(directory):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            fixtures.append(json.load(f))
+    return fixtures
+
+
+def url_key(url):
+    parts = urlsplit(url)
+    return parts.path, tuple(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+class RecordingUpstream(Upstream):
+    """Goes upstream as usual and keeps a copy of every response."""
+
+    def __init__(self, directory=FIXTURES_DIR, config=None):
+        super().__init__(config)
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def request(self, endpoint, params):
+        result = super().request(endpoint, params)
+        fixture = {
+            'endpoint': endpoint.__name__,
+            'params': params,
+            'url': result.get_request_url(),
+            'body': result.get_response(),
+        }
+        with self._lock:
+            with open(fixture_path(self.directory, endpoint.__name__, params), 'w',
+                      encoding='utf-8') as f:
+                json.dump(fixture, f, indent=1, default=str)
+        return result
+
+
+class ReplayUpstream(Upstream):
+    """Answers every request from recorded fixtures, never the network."""
+
+    def __init__(self, directory=FIXTURES_DIR, latency=0, error_rate=0, config=None):
+        super().__init__(config)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.bodies = {
+            (fixture['endpoint'], params_json(fixture['params'])): fixture['body']
+            for fixture in load_fixtures(directory)
+        }
+
+    def request(self, endpoint, params):
+        self.calls += 1
+        body = self.bodies.get((endpoint.__name__, params_json(params)))
+        if body is None:
+            raise FixtureMissing(f"No fixture for {endpoint.__name__} {params_json(params)}")
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise requests.exceptions.ReadTimeout("injected by fixture replay")
+        return rehydrate(endpoint, params, body)
+
+
+def fixture_upstream(config):
+    """The Upstream the fixture settings in config ask for, or None."""
+    mode = config.get('fixtures')
+    directory = config.get('fixtures_dir', FIXTURES_DIR)
+    if mode == 'record':
+        return RecordingUpstream(directory, config=config)
+    if mode == 'replay':
+        return ReplayUpstream(directory, float(config.get('fixtures_latency', 0)),
+                              float(config.get('fixtures_error_rate', 0)), config=config)
+    return None
+
+
+def make_server(directory, port=8080, latency=0, error_rate=0):
+    """HTTP stand-in for stats.nba.com and cdn.nba.com serving recorded bodies
+    by request path and query string."""
+    bodies = {url_key(fixture['url']): fixture['body']
+              for fixture in load_fixtures(directory) if fixture.get('url')}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            body = bodies.get(url_key(self.path))
+            if error_rate and random.random() < error_rate:
+                self.send_error(503, "injected by fixture server")
+            elif body is None:
+                self.send_error(404, "no fixture")
+            else:
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+    return ThreadingHTTPServer(('127.0.0.1', port), Handler)
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description="Serve recorded fixtures over HTTP")
+    args.add_argument('directory', nargs='?', default=FIXTURES_DIR)
+    args.add_argument('--port', type=int, default=8080)
+    args.add_argument('--latency', type=float, default=0)
+    args.add_argument('--error-rate', type=float, default=0)
+    args = args.parse_args()
+    server = make_server(args.directory, args.port, args.latency, args.error_rate)
+    print(f"Serving {args.directory} on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import time
+
+from dateutil import parser
+
+from scores_helpers import memo_by_response, short_date, shorten
+
+PREGAME, LIVE, FINAL = 1, 2, 3  # GAME_STATUS_ID / gameStatus
+
+
+class Side:
+    """One team in a game."""
+
+    def __init__(self, team_id, team):
+        self.team_id = team_id
+        self.name = team['nickname'] if team else ''
+        self.abbreviation = team['abbreviation'] if team else ''
+        self.score = None
+        self.periods = []
+
+
+class Game:
+    """A game as the stats Scoreboard and, when it has it, the live
+    ScoreBoard see it, with names already looked up."""
+
+    def __init__(self, row, team_index):
+        self.game_id = row['GAME_ID']
+        self.date = row['GAME_DATE_EST']
+        self.status = int(row['GAME_STATUS_ID'])
+        self.status_text = row['GAME_STATUS_TEXT'].strip()
+        self.tipoff = None
+        self.broadcaster = (row['NATL_TV_BROADCASTER_ABBREVIATION'] or '').strip()
+        self.home = Side(row['HOME_TEAM_ID'], team_index.get(row['HOME_TEAM_ID']))
+        self.away = Side(row['VISITOR_TEAM_ID'], team_index.get(row['VISITOR_TEAM_ID']))
+        self.leader = None  # (last name, points, rebounds, assists)
+
+    def side(self, team_id):
+        return self.home if self.home.team_id == team_id else self.away
+
+    def add_line_score(self, row):
+        side = self.side(row['TEAM_ID'])
+        side.abbreviation = row['TEAM_ABBREVIATION']
+        side.score = row['PTS']
+        side.periods = [row[key] for key in ('PTS_QTR1', 'PTS_QTR2', 'PTS_QTR3', 'PTS_QTR4')
+                        if row.get(key) is not None]
+
+    def add_live(self, live, player_index):
+        self.status = live['gameStatus']
+        self.status_text = live['gameStatusText'].strip()
+        self.tipoff = live['gameTimeUTC']
+        for side, team in ((self.home, live['homeTeam']), (self.away, live['awayTeam'])):
+            side.abbreviation = team['teamTricode']
+            side.score = team['score']
+            side.periods = [period['score'] for period in team.get('periods', [])]
+        leaders = live['gameLeaders']
+        if leaders['homeLeaders']['points'] > leaders['awayLeaders']['points']:
+            leader = leaders['homeLeaders']
+        else:
+            leader = leaders['awayLeaders']
+        player = player_index.get(leader['personId'])
+        if player:
+            self.leader = (player['last_name'], leader['points'],
+                           leader['rebounds'], leader['assists'])
+
+
+class GameDay:
+    """Every game on one date, merged from the stats Scoreboard (GameHeader
+    and LineScore) and, for today, the live ScoreBoard."""
+
+    def __init__(self, game_date, header, line_score=(), live_games=(),
+                 team_index=None, player_index=None, today=False):
+        self.game_date = game_date
+        self.today = today
+        self.fetched = time.time()
+        self.games = []
+        self.by_id = {}
+        self.by_team = {}
+        for row in header:
+            if row['GAME_ID'] in self.by_id:
+                continue  # keep the first row if a game is listed twice
+            game = self.by_id[row['GAME_ID']] = Game(row, team_index)
+            self.games.append(game)
+            self.by_team.setdefault(game.home.team_id, game)
+            self.by_team.setdefault(game.away.team_id, game)
+        for row in line_score:
+            if row['GAME_ID'] in self.by_id:
+                self.by_id[row['GAME_ID']].add_line_score(row)
+        for live in live_games:
+            if live['gameId'] in self.by_id:
+                self.by_id[live['gameId']].add_live(live, player_index)
+
+    @classmethod
+    @memo_by_response
+    def from_scoreboard(cls, response, team_index, player_index):
+        """GameDay for a stats Scoreboard response, built once per response."""
+        data = response.get_normalized_dict()
+        header = data['GameHeader']
+        game_date = header[0]['GAME_DATE_EST'] if header else None
+        return cls(game_date, header, data['LineScore'],
+                   team_index=team_index, player_index=player_index)
+
+    def game_for_team(self, team_id):
+        return self.by_team.get(team_id)
+
+    def is_live(self):
+        return any(game.status == LIVE for game in self.games)
+
+    def finals(self):
+        return sum(game.status == FINAL for game in self.games)
+
+    def next_tipoff(self):
+        tipoffs = [parser.parse(game.tipoff) for game in self.games
+                   if game.status == PREGAME and game.tipoff]
+        if not tipoffs:
+            return None
+        return min(tipoffs)
+
+
+def render_scores(day, topic=False):
+    """-scores text (or the short form for channel topics) for a GameDay."""
+    score_text = ""
+    topic_text = ""
+    for game in day.games:
+        if game.status == PREGAME or (topic and game.status == LIVE):
+            if score_text != "":
+                score_text += " | "
+                topic_text += " "
+            else:
+                score_text = f"🏀{short_date(game.date)}: "
+            score_text += f"{game.home.name} vs {game.away.name} {game.status_text}"
+            topic_text += f"{game.home.abbreviation}@{game.away.abbreviation}"
+            if game.broadcaster == "TNT":
+                score_text += " \x0304,08\x02TNT\x02\x0f"
+            elif game.broadcaster:
+                score_text += f" \x02{game.broadcaster}\x02"
+
+    for game in day.games:
+        if game.status == PREGAME or game.home.score is None:
+            continue
+        if score_text != "":
+            score_text += " | "
+            topic_text += " "
+        elif day.today:
+            score_text = "Today: "
+        else:
+            score_text = f"🏀{short_date(game.date)}: "
+        home, away = game.home, game.away
+        score_text += f"{home.abbreviation} {home.score} {away.abbreviation} {away.score}"
+        if game.leader:
+            last_name, points, rebounds, assists = game.leader
+            score_text += f" {shorten(last_name, 8)} {points}/{rebounds}/{assists} "
+        if game.status == LIVE:
+            score_text += f" \x02{game.status_text}\x02"
+        if home.score > away.score:
+            topic_text += f"{home.abbreviation}>{away.abbreviation}"
+        else:
+            topic_text += f"{home.abbreviation}<{away.abbreviation}"
+    if topic:
+        return topic_text
+    return score_text
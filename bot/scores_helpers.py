@@ -1,5 +1,9 @@
+import functools
+import weakref
 from datetime import datetime
 
+import pytz
+
 
 def rank(label, rank):
     return f"#{rank} {label}"
@@ -24,6 +28,9 @@ def pct(total, count):
 def today():
     return datetime.today().strftime("%Y-%m-%d")
 
+def pacific_today():
+    return datetime.now(pytz.timezone('US/Pacific')).strftime("%m/%d/%Y")
+
 def small_date(date):
         #2021-11-23T00:00:00
         datetime_object = datetime.strptime(date,"%Y-%m-%dT00:00:00")
@@ -43,8 +50,10 @@ def schedule_date( date):
     datetime_object = datetime.strptime(date,"%b %d, %Y")
     return datetime_object.strftime("%a %-m/%-d")
 
-def h2h_date( date):
+def h2h_date( date, year=False):
     datetime_object = datetime.strptime(date,"%Y-%m-%d")
+    if year:
+        return datetime_object.strftime("%-m/%-d/%y")
     return datetime_object.strftime("%-m/%-d")
 
 def shorten(word, length):
@@ -56,3 +65,24 @@ def opp_from_matchup(matchup):
     if '@' in matchup:
         return matchup[matchup.index('@'):]
     return matchup[matchup.index('vs.'):]
+
+def ago(seconds):
+    # 45s, 4m, 3h, 2d
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def memo_by_response(build):
+    """Keep what build makes of an endpoint response for as long as the
+    response itself is around (i.e. cached). Goes under @classmethod."""
+    built = weakref.WeakKeyDictionary()
+
+    @functools.wraps(build)
+    def wrapper(cls, response, *args, **kwargs):
+        value = built.get(response)
+        if value is None:
+            value = built[response] = build(cls, response, *args, **kwargs)
+        return value
+    return wrapper
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import configparser
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+NICKNAMES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nicknames.ini')
+
+FUZZY_MATCH = 0.6    # trigram similarity we accept without asking
+FUZZY_SUGGEST = 0.3  # trigram similarity worth a "did you mean"
+
+
+def normalize(name):
+    """Lowercase, accent folded, punctuation free form of a name."""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = name.lower().replace("'", '').replace('.', '')
+    return ' '.join(re.split(r'[\s\-]+', name.strip()))
+
+
+def trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_nicknames(path, section):
+    parser = configparser.ConfigParser()
+    parser.read(path, encoding='utf-8')
+    if not parser.has_section(section):
+        return {}
+    return {normalize(key): value for key, value in parser.items(section)}
+
+
+class PlayerIndex:
+    """Every static nba_api player, indexed once for name lookups.
+
+    Players are ranked active first, then in nba_api's own order, so the
+    first hit for any key is the one the old find_players_by_full_name scan
+    would have picked.
+    """
+
+    def __init__(self, players, nicknames=None):
+        ranked = sorted(players, key=lambda player: not player['is_active'])
+        self.by_id = {}
+        self.rank = {}
+        self.full_names = defaultdict(list)
+        self.prefixes = defaultdict(set)
+        self.grams = defaultdict(set)
+        self.gram_counts = {}
+        for position, player in enumerate(ranked):
+            player_id = player['id']
+            name = normalize(player['full_name'])
+            self.by_id[player_id] = player
+            self.rank[player_id] = position
+            self.full_names[name].append(player_id)
+            for token in name.split():
+                for end in range(1, len(token) + 1):
+                    self.prefixes[token[:end]].add(player_id)
+            grams = trigrams(name)
+            self.gram_counts[player_id] = len(grams)
+            for gram in grams:
+                self.grams[gram].add(player_id)
+
+        self.nicknames = {}
+        for nickname, full_name in (nicknames or {}).items():
+            ids = self.full_names.get(normalize(full_name))
+            if ids:
+                self.nicknames[normalize(nickname)] = ids[0]
+
+    def get(self, player_id):
+        return self.by_id.get(player_id)
+
+    def _best(self, ids):
+        return min(ids, key=self.rank.__getitem__)
+
+    def _prefix_match(self, tokens):
+        ids = None
+        for token in tokens:
+            matches = self.prefixes.get(token)
+            if not matches:
+                return None
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                return None
+        return ids
+
+    def fuzzy(self, name, limit=3):
+        """(similarity, player_id) pairs closest to name, best first."""
+        query = trigrams(name)
+        shared = Counter()
+        for gram in query:
+            for player_id in self.grams.get(gram, ()):
+                shared[player_id] += 1
+        scored = []
+        for player_id, count in shared.items():
+            score = 2 * count / (len(query) + self.gram_counts[player_id])
+            scored.append((score, -self.rank[player_id], player_id))
+        scored.sort(reverse=True)
+        return [(score, player_id) for score, _, player_id in scored[:limit]]
+
+    def find(self, name):
+        """Best player id for name, or None."""
+        name = normalize(name)
+        if not name:
+            return None
+        if name in self.nicknames:
+            return self.nicknames[name]
+        if name in self.full_names:
+            return self.full_names[name][0]
+        ids = self._prefix_match(name.split())
+        if ids:
+            return self._best(ids)
+        matches = self.fuzzy(name, limit=1)
+        if matches and matches[0][0] >= FUZZY_MATCH:
+            return matches[0][1]
+        return None
+
+    def suggest(self, name, limit=3):
+        return [self.by_id[player_id]['full_name']
+                for score, player_id in self.fuzzy(normalize(name), limit)
+                if score >= FUZZY_SUGGEST]
+
+
+class TeamIndex:
+    """Every static nba_api team keyed by id, tricode, nickname, city, full
+    name, each word of the full name and any aliases from the nicknames
+    file. Anything else is looked for inside the full names (\"blaz\",
+    \"golden state\"). Where a key is shared (\"los angeles\") the first team
+    in nba_api's order wins, as it did with find_teams_by_full_name."""
+
+    def __init__(self, teams, aliases=None):
+        self.by_id = {}
+        self.names = {}
+        self.full_names = []  # (normalized full name, team) in nba_api's order
+        for team in teams:
+            self.by_id[team['id']] = team
+            self.full_names.append((normalize(team['full_name']), team))
+            keys = [team['full_name'], team['abbreviation'], team['nickname'], team['city']]
+            keys += normalize(team['full_name']).split()
+            for key in keys:
+                self.names.setdefault(normalize(key), team)
+        for alias, full_name in (aliases or {}).items():
+            team = self.names.get(normalize(full_name))
+            if team:
+                self.names[normalize(alias)] = team
+
+    def get(self, team_id):
+        return self.by_id.get(team_id)
+
+    def find(self, name):
+        name = normalize(name)
+        if not name:
+            return None
+        team = self.names.get(name)
+        if team is None:
+            team = next((team for full_name, team in self.full_names if name in full_name), None)
+        return team
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timezone
+
+from scores_gameday import GameDay
+from scores_helpers import pacific_today
+
+log = logging.getLogger(__name__)
+
+PREGAME_WINDOW = 30 * 60  # start polling at the live cadence this long before tip-off
+RECENT_ACTIONS = 50  # play by play actions kept per game
+SPARKS = '▁▂▃▄▅▆▇█'
+
+
+class LivePoller:
+    """Keeps a GameDay snapshot fresh from a background task.
+
+    Polls every ``live_poll_interval`` seconds while a game is on (or about to
+    tip off) and every ``idle_poll_interval`` seconds otherwise. Commands read
+    ``snapshot()`` instead of fetching the scoreboards themselves.
+
+    Only the cdn ScoreBoard is polled at the live cadence. It carries the
+    status and scores; the stats Scoreboard (game list, broadcasters) is
+    fetched again once it is ``idle_poll_interval`` old or the date changes.
+    """
+
+    def __init__(self, plugin, config=None):
+        config = config or {}
+        self.plugin = plugin
+        self.loop = plugin.bot.loop
+        self.live_interval = float(config.get('live_poll_interval', 15))
+        self.idle_interval = float(config.get('idle_poll_interval', 600))
+        self._snapshot = None
+        self._header = None  # (game date, time fetched, stats Scoreboard)
+        self._handle = None
+        self.listeners = []  # called on the event loop with each new snapshot
+
+    def start(self):
+        if self._handle is None:
+            self._handle = self.loop.call_soon(self._tick)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def take_over(self, old):
+        """Carry on from another poller's snapshot and schedule (on -reload)."""
+        running = old._handle is not None
+        old.stop()
+        self._snapshot = old._snapshot
+        self._header = old._header
+        if running:
+            delay = self.next_delay(self._snapshot) if self._snapshot else 0
+            self._handle = self.loop.call_later(delay, self._tick)
+
+    def _tick(self):
+        future = self.loop.run_in_executor(self.plugin.workers.executor, self.refresh)
+        future.add_done_callback(self._schedule)
+
+    def _schedule(self, future):
+        if self._handle is None:  # stopped while refreshing
+            return
+        if future.exception():
+            log.warning("live poll failed: %r", future.exception())
+            delay = self.live_interval
+        else:
+            delay = self.next_delay(future.result())
+            for listener in self.listeners:
+                try:
+                    listener(future.result())
+                except Exception:
+                    log.exception("live poll listener failed")
+        self._handle = self.loop.call_later(delay, self._tick)
+
+    def next_delay(self, snapshot):
+        if snapshot.is_live():
+            return self.live_interval
+        tipoff = snapshot.next_tipoff()
+        if tipoff:
+            until = (tipoff - datetime.now(timezone.utc)).total_seconds()
+            if until < PREGAME_WINDOW:
+                return self.live_interval
+            return min(self.idle_interval, until - PREGAME_WINDOW)
+        return self.idle_interval
+
+    def refresh(self):
+        game_date = pacific_today()
+        scoreboard = self._stats_scoreboard(game_date)
+        live_games = self.plugin.live_scoreboard.ScoreBoard.fresh().games.get_dict()
+        self._snapshot = GameDay(game_date, scoreboard['GameHeader'], scoreboard['LineScore'],
+                                 live_games, self.plugin.team_index, self.plugin.player_index,
+                                 today=True)
+        return self._snapshot
+
+    def _stats_scoreboard(self, game_date):
+        header = self._header
+        now = time.monotonic()
+        if header is None or header[0] != game_date or now - header[1] >= self.idle_interval:
+            scoreboard = self.plugin.scoreboard.Scoreboard.fresh(
+                game_date=game_date).get_normalized_dict()
+            header = self._header = (game_date, now, scoreboard)
+        return header[2]
+
+    def snapshot(self):
+        """Latest snapshot, fetched inline if the poller has nothing for today."""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.game_date != pacific_today():
+            snapshot = self.refresh()
+        return snapshot
+
+
+class TopicUpdater:
+    """Keeps channel topics in line with the live snapshot.
+
+    Renders ``topic_format`` (``{scores}`` is replaced by the topic scores)
+    for each of ``topic_channels`` after every poll, and only sends TOPIC when
+    the text changed and ``topic_min_interval`` seconds have passed since the
+    last one for that channel.
+    """
+
+    def __init__(self, bot, render, config=None):
+        config = config or {}
+        self.bot = bot
+        self.render = render
+        self.channels = config.get('topic_channels', '').split()
+        self.format = config.get('topic_format', '{scores}')
+        self.min_interval = float(config.get('topic_min_interval', 300))
+        self.topics = {}  # channel -> (topic, time set)
+
+    def __call__(self, snapshot):
+        if not self.channels:
+            return
+        topic = self.format.format(scores=self.render(snapshot))
+        now = time.monotonic()
+        for channel in self.channels:
+            last_topic, last_set = self.topics.get(channel, (None, None))
+            if topic == last_topic:
+                continue
+            if last_set is not None and now - last_set < self.min_interval:
+                continue  # picked up again after a later poll
+            self.bot.topic(channel, topic)
+            self.topics[channel] = (topic, now)
+
+
+class PlayByPlayTracker:
+    """Recent play by play for one game.
+
+    cdn.nba.com only serves the whole game, but only actions past the last
+    seen actionNumber are walked and kept, in a ring buffer of the most
+    recent ``size`` actions.
+    """
+
+    def __init__(self, game_id, size=RECENT_ACTIONS):
+        self.game_id = game_id
+        self.cursor = 0
+        self.recent = deque(maxlen=size)
+        self._last_response = None
+        self._lock = threading.Lock()
+
+    def update(self, response):
+        with self._lock:
+            if response is self._last_response:  # still the cached fetch
+                return 0
+            self._last_response = response
+            actions = response.get_dict()['game']['actions']
+            start = len(actions)
+            while start > 0 and actions[start - 1]['actionNumber'] > self.cursor:
+                start -= 1
+            new_actions = actions[start:]
+            if new_actions:
+                self.cursor = new_actions[-1]['actionNumber']
+                self.recent.extend(new_actions)
+            return len(new_actions)
+
+    def last(self, count):
+        with self._lock:
+            recent = list(self.recent)
+        return recent[len(recent) - min(count, len(recent)):]
+
+
+def elapsed(period, seconds_remaining):
+    """Seconds of game time played at a period and clock reading."""
+    if period <= 4:
+        return (period - 1) * 720 + 720 - seconds_remaining
+    return 4 * 720 + (period - 5) * 300 + 300 - seconds_remaining
+
+
+class WinProbabilityTracker:
+    """Home win probability through one game.
+
+    stats.nba.com serves the whole series each time, but only rows past the
+    last seen game time are walked and appended, so the latest value and
+    each team's biggest lead are kept up to date as they arrive.
+    """
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.times = []      # game seconds played, ascending
+        self.home_pct = []
+        self.latest = None   # (home pct, visitor pct, home pts, visitor pts)
+        self.home_lead = 0   # biggest lead each side has had
+        self.visitor_lead = 0
+        self._last_response = None
+        self._lock = threading.Lock()
+
+    def update(self, response):
+        with self._lock:
+            if response is self._last_response:  # still the cached fetch
+                return 0
+            self._last_response = response
+            data = response.win_prob_p_bp.get_dict()
+            column = {header: i for i, header in enumerate(data['headers'])}
+            home_pct, visitor_pct = column['HOME_PCT'], column['VISITOR_PCT']
+            home_pts, visitor_pts = column['HOME_PTS'], column['VISITOR_PTS']
+            period, remaining = column['PERIOD'], column['SECONDS_REMAINING']
+            rows = data['data']
+            cursor = self.times[-1] if self.times else -1
+            start = len(rows)
+            while start > 0 and elapsed(rows[start - 1][period],
+                                        rows[start - 1][remaining]) > cursor:
+                start -= 1
+            added = 0
+            for row in rows[start:]:
+                if row[home_pct] is None or not (row[home_pct] or row[visitor_pct]):
+                    continue  # no probability for this event
+                self.times.append(elapsed(row[period], row[remaining]))
+                self.home_pct.append(row[home_pct])
+                if row[home_pts] is not None and row[visitor_pts] is not None:
+                    self.latest = (row[home_pct], row[visitor_pct],
+                                   row[home_pts], row[visitor_pts])
+                    self.home_lead = max(self.home_lead, row[home_pts] - row[visitor_pts])
+                    self.visitor_lead = max(self.visitor_lead, row[visitor_pts] - row[home_pts])
+                added += 1
+            return added
+
+    def at(self, seconds):
+        """Home win probability as of a game time, None before the first row."""
+        i = bisect_right(self.times, seconds)
+        return self.home_pct[i - 1] if i else None
+
+    def swing(self, seconds):
+        """Change in home win probability over the last ``seconds`` of game time."""
+        with self._lock:
+            if not self.times:
+                return 0
+            before = self.at(self.times[-1] - seconds)
+            return self.home_pct[-1] - (before if before is not None else self.home_pct[0])
+
+    def sparkline(self, width=16, home=True):
+        """The series sampled at ``width`` even steps of game time."""
+        with self._lock:
+            if not self.times:
+                return ''
+            first, last = self.times[0], self.times[-1]
+            step = (last - first) / max(width - 1, 1)
+            line = ''
+            for n in range(width):
+                pct = self.at(first + n * step)
+                if not home:
+                    pct = 1 - pct
+                line += SPARKS[min(int(pct * len(SPARKS)), len(SPARKS) - 1)]
+            return line
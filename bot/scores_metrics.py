@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import bisect
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# histogram bucket upper bounds, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def error_kind(exc):
+    if isinstance(exc, (requests.exceptions.Timeout, asyncio.TimeoutError)):
+        return 'timeout'
+    if isinstance(exc, requests.exceptions.HTTPError):
+        return 'http'
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        return 'connection'
+    if isinstance(exc, ValueError):  # blocked upstreams answer with html, not json
+        return 'invalid_response'
+    return type(exc).__name__
+
+
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """Command and upstream call counters, shared by the worker threads."""
+
+    def __init__(self):
+        self.commands = defaultdict(Histogram)
+        self.command_errors = defaultdict(int)   # (command, kind) -> count
+        self.upstream = defaultdict(Histogram)
+        self.upstream_errors = defaultdict(int)  # (endpoint, kind) -> count
+        self._lock = threading.Lock()
+
+    def command(self, name, seconds, exc=None):
+        with self._lock:
+            self.commands[name].observe(seconds)
+            if exc is not None:
+                self.command_errors[name, error_kind(exc)] += 1
+
+    def upstream_call(self, endpoint, seconds, exc=None):
+        with self._lock:
+            self.upstream[endpoint].observe(seconds)
+            if exc is not None:
+                self.upstream_errors[endpoint, error_kind(exc)] += 1
+
+    @staticmethod
+    def _errors(errors, name):
+        return ' '.join(f"{kind}:{count}" for (key, kind), count in sorted(errors.items())
+                        if key == name)
+
+    def summary(self):
+        """Short lines for the -metrics command."""
+        with self._lock:
+            commands = []
+            for name, histogram in sorted(self.commands.items()):
+                line = (f"{name} {histogram.count}x p50 {ms(histogram.quantile(.5))}"
+                        f" p95 {ms(histogram.quantile(.95))}")
+                errors = self._errors(self.command_errors, name)
+                if errors:
+                    line += f" err {errors}"
+                commands.append(line)
+            upstream = []
+            for name, histogram in sorted(self.upstream.items()):
+                line = f"{name} {histogram.count}x avg {ms(histogram.sum / histogram.count)}"
+                errors = self._errors(self.upstream_errors, name)
+                if errors:
+                    line += f" err {errors}"
+                upstream.append(line)
+        return [f"commands: {' | '.join(commands) or 'none yet'}",
+                f"upstream: {' | '.join(upstream) or 'none yet'}"]
+
+    def prometheus(self, gauges=None):
+        """Prometheus text exposition; gauges are extra name -> value pairs."""
+        lines = []
+        with self._lock:
+            _histograms(lines, 'scores_command_seconds', 'command', self.commands)
+            _counters(lines, 'scores_command_errors_total', 'command', self.command_errors)
+            _histograms(lines, 'scores_upstream_seconds', 'endpoint', self.upstream)
+            _counters(lines, 'scores_upstream_errors_total', 'endpoint', self.upstream_errors)
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def ms(seconds):
+    if seconds == float('inf'):
+        return '>30s'
+    return f"{seconds * 1000:.0f}ms"
+
+
+def _histograms(lines, name, label, histograms):
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.sum}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+
+
+def _counters(lines, name, label, counters):
+    lines.append(f"# TYPE {name} counter")
+    for (key, kind), count in sorted(counters.items()):
+        lines.append(f'{name}{{{label}="{key}",kind="{kind}"}} {count}')
+
+
+def start_server(render, port, host='127.0.0.1'):
+    """Serve ``render()`` as text on http://host:port/metrics from a thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            data = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='scores-metrics', daemon=True).start()
+    return server
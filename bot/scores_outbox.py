@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import re
+import time
+
+SEPARATORS = (' | ', ' ')  # split listings here first, then between words
+HOST_RESERVE = 63  # longest hostname the server may put in front of our lines
+FORMAT_RESERVE = 8  # bytes kept free to close and reopen bold/colour at a split
+
+# a colour code with its numbers, or any single character
+TOKEN = re.compile(r'\x03(?:\d{1,2}(?:,\d{1,2})?)?|.', re.S)
+BOLD = '\x02'
+COLOR = '\x03'
+RESET = '\x0f'
+
+
+def _size(text, encoding='utf-8'):
+    return len(text.encode(encoding))
+
+
+def _formatting(text):
+    """Bold/colour codes still open at the end of text."""
+    bold = False
+    color = ''
+    for token in TOKEN.findall(text):
+        if token == BOLD:
+            bold = not bold
+        elif token.startswith(COLOR):
+            color = '' if token == COLOR else token
+        elif token == RESET:
+            bold, color = False, ''
+    return color + (BOLD if bold else '')
+
+
+def _hard_split(text, max_bytes):
+    lines = []
+    line = ''
+    for token in TOKEN.findall(text):
+        if line and _size(line + token) > max_bytes:
+            lines.append(line)
+            line = ''
+        line += token
+    return lines + [line]
+
+
+def _pack(text, max_bytes, separators):
+    if _size(text) <= max_bytes:
+        return [text]
+    if not separators:
+        return _hard_split(text, max_bytes)
+    sep, rest = separators[0], separators[1:]
+    pieces = text.split(sep)
+    lines = []
+    line = pieces[0]
+    for piece in pieces[1:]:
+        if _size(line + sep + piece) <= max_bytes:
+            line += sep + piece
+        else:
+            lines.append(line)
+            line = piece
+    lines.append(line)
+    return [part for line in lines for part in _pack(line, max_bytes, rest)]
+
+
+def split_reply(text, max_bytes):
+    """Split a reply into lines of at most max_bytes (utf-8), on " | " first,
+    then on spaces, never inside a character or colour code. Bold and colour
+    open at a split are closed and carried over to the next line."""
+    if _size(text) <= max_bytes:
+        return [text]
+    lines = []
+    carry = ''
+    for line in _pack(text, max_bytes - FORMAT_RESERVE, SEPARATORS):
+        line = carry + line.strip()
+        carry = _formatting(line)
+        lines.append(line + RESET if carry else line)
+    return [line for line in lines if line]
+
+
+class Outbox:
+    """Paced, prioritized queue for command replies.
+
+    Replies are split to fit in one IRC line once the server adds our
+    ``nick!user@host`` in front of them (``irc_line_bytes`` overrides the
+    computed size). Lines go out ``irc_burst`` at a time and then
+    ``irc_rate`` per second, defaulting to the bot's flood_burst and
+    flood_rate. Replies of at most ``irc_short_reply`` lines go ahead of
+    longer listings still waiting in the queue.
+    """
+
+    def __init__(self, bot, config=None):
+        config = config or {}
+        self.bot = bot
+        self.loop = bot.loop
+        self.burst = float(config.get('irc_burst', bot.config.get('flood_burst', 4)))
+        self.rate = float(config.get('irc_rate', float(bot.config.get('flood_rate', 1))
+                                     / float(bot.config.get('flood_rate_delay', 1))))
+        self.line_bytes = int(config.get('irc_line_bytes', 0))
+        self.short_reply = int(config.get('irc_short_reply', 2))
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._queue = []
+        self._order = itertools.count()
+        self._handle = None
+
+    def max_bytes(self, target):
+        if self.line_bytes:
+            return self.line_bytes
+        prefix = (f":{self.bot.nick}!{self.bot.config.get('username', self.bot.nick)}@"
+                  f"{'x' * HOST_RESERVE} PRIVMSG {target} :")
+        return 510 - _size(prefix)
+
+    def reply(self, mask, target, replies):
+        """Queue a command's replies the way irc3 addresses them."""
+        to = mask.nick if target == self.bot.nick else target
+        lines = [line for reply in replies or [] if reply
+                 for line in split_reply(str(reply), self.max_bytes(to))]
+        priority = 0 if len(lines) <= self.short_reply else 1
+        for line in lines:
+            heapq.heappush(self._queue, (priority, next(self._order), to, line))
+        if self._handle is None:
+            self._drain()
+
+    def queued(self):
+        return len(self._queue)
+
+    def _drain(self):
+        self._handle = None
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # let lines other plugins queued with irc3 go first, they count too
+        if getattr(self.bot, 'queue', None) is None or self.bot.queue.empty():
+            while self._queue and self.tokens >= 1:
+                _, _, to, line = heapq.heappop(self._queue)
+                self.bot.privmsg(to, line, nowait=True)
+                self.tokens -= 1
+        if self._queue:
+            self._handle = self.loop.call_later(
+                max((1 - self.tokens) / self.rate, 1 / self.rate / 10), self._drain)
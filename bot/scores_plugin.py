@@ -1,59 +1,186 @@
 # -*- coding: utf-8 -*-
 import json
 import re
+import time
 from datetime import datetime
 
 import irc3
-import pytz
 from dateutil import parser
 from irc3.plugins.command import command
 
-from scores_helpers import (avg, h2h_date, opp_from_matchup, pct, rank,
-                            schedule_date, short_date, shorten, small_date,
-                            today)
+from scores_cache import CachedModule, TTLCache, TTLPolicy
+from scores_fixtures import fixture_upstream
+from scores_gameday import GameDay, render_scores
+from scores_helpers import (avg, h2h_date, opp_from_matchup, pacific_today,
+                            pct, rank, schedule_date, short_date,
+                            small_date, today)
+from scores_index import (NICKNAMES_FILE, PlayerIndex, TeamIndex,
+                          load_nicknames)
+from scores_live import (RECENT_ACTIONS, LivePoller, PlayByPlayTracker,
+                         TopicUpdater, WinProbabilityTracker)
+from scores_metrics import Metrics
+from scores_metrics import start_server as start_metrics_server
+from scores_outbox import Outbox
+from scores_prefetch import Prefetcher
+from scores_ratelimit import OutboundScheduler
+from scores_sessions import install_session
+from scores_standings import StandingsModel
+from scores_stats import LEADER_STATS, GameLogs, LeagueStats, SplitError
+from scores_store import STORE_FILE, GameTable, HistoryStore
+from scores_upstream import Upstream
+from scores_workers import CommandPool, offload
+
+
+FIRST_SEASON = 1946
+BACKFILL_INLINE = 2  # missing seasons fetched within the command, more go to the background
+GAMES_REFRESH = 10 * 60  # seconds between current season GameTable top ups
+WIN_TREND = 5 * 60  # game seconds -winchance reports the swing over
 
 
 @irc3.plugin
 class Plugin:
 
-    def __init__(self, bot):
-        from nba_api.live.nba.endpoints import boxscore, playbyplay
-        from nba_api.live.nba.endpoints import scoreboard as livescoreboard
-        from nba_api.stats.endpoints import (commonplayerinfo,
-                                             commonteamroster,
-                                             leaguegamefinder, leaguestandings,
-                                             playercareerstats, playergamelogs,
-                                             scoreboard, teamdetails,
-                                             teamgamelog, teamgamelogs,
-                                             winprobabilitypbp)
-        from nba_api.stats.static import players, teams
+    # built once, then handed over from instance to instance on -reload
+    WARM_STATE = ('player_index', 'team_index', 'cache', 'store', 'ttl_policy',
+                  'metrics', 'workers', 'http', 'upstream', 'outbox', 'pbp_trackers',
+                  'wp_trackers', 'games', 'backfill')
 
+    def __init__(self, bot, warm=None):
         self.bot = bot
-        self.commonplayerinfo = commonplayerinfo
-        self.commonteamroster = commonteamroster
-        self.leaguegamefinder = leaguegamefinder
-        self.leaguestandings = leaguestandings
-        self.scoreboard = scoreboard
-        self.teamgamelog = teamgamelog
-        self.live_scoreboard = livescoreboard
-        self.playbyplay = playbyplay
-        self.playergamelogs = playergamelogs
-        self.playercareerstats = playercareerstats
-        self.teamdetails = teamdetails
-        self.teamgamelogs = teamgamelogs
-        self.winprobabilitypbp = winprobabilitypbp
-        self.boxscore = boxscore
-        self.players = players
-        self.teams = teams
+        self.config = bot.config.get(__name__, {})
         self.CURRENT_SEASON = "2021-22"  # TODO this should not be hardcoded
         self.TEAM_SCORES_GAMES = 7  # number of games to show on -scores <team>
 
+        if warm is None:
+            self._build_state()
+        else:
+            for name in self.WARM_STATE:
+                setattr(self, name, getattr(warm, name))
+
+        # endpoint modules are imported on first use, nba_api.stats.endpoints
+        # pulls in pandas and every endpoint it has
+        cached = lambda module: CachedModule(
+            'nba_api.' + module, self.cache, self.ttl_policy, self.store, self.upstream)
+
+        self.commonplayerinfo = cached('stats.endpoints.commonplayerinfo')
+        self.commonteamroster = cached('stats.endpoints.commonteamroster')
+        self.leaguedashplayerstats = cached('stats.endpoints.leaguedashplayerstats')
+        self.leaguegamefinder = cached('stats.endpoints.leaguegamefinder')
+        self.leaguestandings = cached('stats.endpoints.leaguestandings')
+        self.scoreboard = cached('stats.endpoints.scoreboard')
+        self.teamgamelog = cached('stats.endpoints.teamgamelog')
+        self.live_scoreboard = cached('live.nba.endpoints.scoreboard')
+        self.playbyplay = cached('live.nba.endpoints.playbyplay')
+        self.playergamelogs = cached('stats.endpoints.playergamelogs')
+        self.playercareerstats = cached('stats.endpoints.playercareerstats')
+        self.teamdetails = cached('stats.endpoints.teamdetails')
+        self.teamgamelogs = cached('stats.endpoints.teamgamelogs')
+        self.winprobabilitypbp = cached('stats.endpoints.winprobabilitypbp')
+        self.boxscore = cached('live.nba.endpoints.boxscore')
+
+        self.live = LivePoller(self, self.config)
+        self.topic_updater = TopicUpdater(bot, self._topic_scores, self.config)
+        self.live.listeners.append(self.topic_updater)
+        self.standings_model = StandingsModel(self.leaguestandings, self.CURRENT_SEASON)
+        self.live.listeners.append(self.standings_model)
+        self.prefetcher = Prefetcher(self, self.config)
+        self.live.listeners.append(self.prefetcher)
+        if warm is not None:
+            self.topic_updater.topics = warm.topic_updater.topics
+            self.prefetcher.warmed = warm.prefetcher.warmed
+            self.live.take_over(warm.live)
+
+        self.metrics_server = None
+        if self.config.get('metrics_port'):
+            self.metrics_server = start_metrics_server(
+                self.prometheus_metrics, int(self.config['metrics_port']),
+                self.config.get('metrics_host', '127.0.0.1'))
+
+    def _build_state(self):
+        from nba_api.stats.static import players, teams
+
+        nicknames = self.config.get('nicknames', NICKNAMES_FILE)
+        self.player_index = PlayerIndex(
+            players.get_players(), load_nicknames(nicknames, 'players'))
+        self.team_index = TeamIndex(
+            teams.get_teams(), load_nicknames(nicknames, 'teams'))
+
+        self.cache = TTLCache(maxsize=int(self.config.get('cache_size', 1024)))
+        self.store = HistoryStore(self.config.get('store', STORE_FILE))
+        self.games = GameTable(self.config.get('store', STORE_FILE))
+        self.backfill = None  # Future of a running GameTable backfill
+        retired = [player['id'] for player in self.player_index.by_id.values()
+                   if not player['is_active']]
+        self.ttl_policy = TTLPolicy(self.CURRENT_SEASON, self.config, retired)
+        self.metrics = Metrics()
+        self.workers = CommandPool(self.bot.loop, self.config, self.metrics)
+        self.http = install_session(self.config, self.workers.threads)
+        self.upstream = fixture_upstream(self.config) or Upstream(self.config)
+        self.upstream.metrics = self.metrics
+        self.upstream.scheduler = OutboundScheduler(self.ttl_policy, self.config)
+        self.upstream.background = self.workers.fanout
+        self.outbox = Outbox(self.bot, self.config)
+        self.pbp_trackers = {}
+        self.wp_trackers = {}
+
+    def connection_made(self):
+        self.live.start()
+
     @classmethod
     def reload(cls, old):
         """this method should return a ready to use plugin instance.
         cls is the newly reloaded class. old is the old instance.
+
+        Caches, indexes, the worker pool, the http session and the live
+        snapshot carry over, so a reload mid-game doesn't start cold.
         """
-        return cls(old.bot)
+        old._stop_metrics_server()
+        return cls(old.bot, warm=old)
+
+    def SIGINT(self):
+        # irc3 notifies every plugin before it stops the loop
+        self.shutdown()
+
+    def shutdown(self):
+        """Stop polling and the pools and close the sqlite files, for good
+        (a -reload hands all of it to the next instance instead)."""
+        self.live.stop()
+        self._stop_metrics_server()
+        self.workers.shutdown()
+        self.store.close()
+        self.games.close()
+
+    def _stop_metrics_server(self):
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+
+    def metrics_summary(self):
+        """Lines for the admin -metrics command in ripcity_plugin."""
+        cache = self.cache.stats()
+        store = self.store.stats()
+        outbound = self.upstream.scheduler.stats()
+        return self.metrics.summary() + [
+            f"cache: {cache['size']}/{cache['maxsize']} entries {cache['hits']} hits {cache['misses']} misses"
+            f" ({cache['hit_rate']:.0%}) {cache['coalesced']} coalesced {cache['evictions']} evicted"
+            f" {cache['stale']} stale"
+            f" | store: {store['responses']} responses {store['hits']} hits {store['misses']} misses",
+            f"outbound: stats {outbound['stats_queued']} queued {outbound['stats_shed']} shed"
+            f" {outbound['stats_trips']} trips{' OPEN' if outbound['stats_open'] else ''}"
+            f" | live {outbound['live_queued']} queued {outbound['live_shed']} shed"
+            f" {outbound['live_trips']} trips{' OPEN' if outbound['live_open'] else ''}"
+            f" | irc {self.outbox.queued()} lines queued"] + (
+            [f"proxies: {' | '.join(self.http.proxy_pool.summary())}"]
+            if self.http.proxy_pool else [])
+
+    def prometheus_metrics(self):
+        gauges = {f"scores_cache_{key}": value for key, value in self.cache.stats().items()}
+        gauges.update({f"scores_store_{key}": value for key, value in self.store.stats().items()})
+        gauges.update({f"scores_outbound_{key}": value
+                       for key, value in self.upstream.scheduler.stats().items()})
+        gauges['scores_irc_queued'] = self.outbox.queued()
+        return self.metrics.prometheus(gauges)
 
     def _get_season(self, season_text):
         year_match  = re.search('^[0-9][0-9][0-9][0-9]', season_text)
@@ -75,29 +202,16 @@ class Plugin:
         return season
 
     def _player_name_to_id(self, name):
-        nicknames = {
-            'steph': 'stephen curry',
-            'steph curry': 'stephen curry',
-            'cp3': 'chris paul',
-            'pg': 'paul george',
-            'dame': 'damian lillard',
-            'shaq': 'shaquille o\'neal',
-            'freedom': 'enes kanter'
-
-        }
-        if name in nicknames:
-            name = nicknames[name]
-        players = self.players.find_players_by_full_name(name)
-        id = None
-        if not players:
-            return id
-        for player in players:
-            if player['is_active']:
-                return player['id']
-        if not id:
-            return players[0]['id']
+        return self.player_index.find(name)
+
+    def _player_not_found(self, name):
+        suggestions = self.player_index.suggest(name)
+        if not suggestions:
+            return "Player not found."
+        return f"Player not found. Did you mean: {', '.join(suggestions)}?"
 
     @command(permission='view')
+    @offload
     def player(self, mask, target, args):
         """Player
 
@@ -106,7 +220,8 @@ class Plugin:
         name = ' '.join(args['<name>'])
         id = self._player_name_to_id(name)
         if not id:
-            yield "Player not found."
+            yield self._player_not_found(name)
+            return
 
         player = self.commonplayerinfo.CommonPlayerInfo(
             player_id=id).get_normalized_dict()
@@ -127,6 +242,7 @@ class Plugin:
         yield player_string
 
     @command(permission='view')
+    @offload
     def career(self, mask, target, args):
         """Career stats
 
@@ -135,10 +251,10 @@ class Plugin:
         name = ' '.join(args['<name>'])
         player_id = self._player_name_to_id(name)
         if not player_id:
-            yield "Player not found."
+            yield self._player_not_found(name)
             return
 
-        player = self.players.find_player_by_id(player_id)
+        player = self.player_index.get(player_id)
         stats = self.playercareerstats.PlayerCareerStats(
             player_id=player_id).get_normalized_dict()
         if args['all-star']:
@@ -156,23 +272,87 @@ class Plugin:
 
     def print_season(self, player,  log):
         print(log)
+        fields = self.season_fields(log)
         log_str = f" {player['full_name']}"
-        log_str += f" {avg(log['PTS'], log['GP'])} PT "
+        for field in fields[:-1]:
+            log_str += f" {field} "
+        log_str += f" {fields[-1]}"
+        label = self.season_label(log)
+        if label:
+            log_str += f"  {label}"
+        return log_str
+
+    def season_fields(self, log):
+        """print_season's columns: per game averages and shooting."""
+        fields = [f"{avg(log['PTS'], log['GP'])} PT"]
         for stat in [['FG', log['FGM'], log['FGA']], ['FT', log['FTM'], log['FTA']], ['3P', log['FG3M'], log['FG3A']]]:
-            log_str += f" {pct(stat[1],stat[2])} of {avg(stat[2],log['GP'])} {stat[0]} "
+            fields.append(f"{pct(stat[1],stat[2])} of {avg(stat[2],log['GP'])} {stat[0]}")
         for stat in [['RB', log['REB']], ['AS', log['AST']], ['BLK', log['BLK']], ['ST', log['STL']], ['TO', log['TOV']], ['PF', log['PF']], ['MIN', log['MIN']]]:
-            log_str += f" {avg(stat[1],log['GP'])} {stat[0]} "
-        log_str += f" {log['GS']}/{log['GP']} GS"
-        if 'SEASON_ID' in log:
-            log_str += f"  ({log['SEASON_ID']}"
-            if 'TEAM_ABBREVIATION' in log:
-                log_str += f" {log['TEAM_ABBREVIATION']}"
-            if 'SCHOOL_NAME' in log:
-                log_str += f" {log['SCHOOL_NAME']}"
-            log_str += ")"
-        return log_str
+            fields.append(f"{avg(stat[1],log['GP'])} {stat[0]}")
+        fields.append(f"{log['GS']}/{log['GP']} GS")
+        return fields
+
+    def season_label(self, log):
+        if 'SEASON_ID' not in log:
+            return ""
+        label = f"({log['SEASON_ID']}"
+        if 'TEAM_ABBREVIATION' in log:
+            label += f" {log['TEAM_ABBREVIATION']}"
+        if 'SCHOOL_NAME' in log:
+            label += f" {log['SCHOOL_NAME']}"
+        return label + ")"
 
     @command(permission='view')
+    @offload
+    def compare(self, mask, target, args):
+        """Compare players
+
+            %%compare [playoffs] (<name>... | -s <season> <name>...)
+            [-compare dame, steph, luka] career averages side by side, or one season with -s
+        """
+        names = [name.strip() for name in ' '.join(args['<name>']).split(',') if name.strip()]
+        if len(names) < 2:
+            yield "Usage: -compare <name>, <name>[, ...]"
+            return
+        player_ids = []
+        for name in names:
+            player_id = self._player_name_to_id(name)
+            if not player_id:
+                yield self._player_not_found(name)
+                return
+            player_ids.append(player_id)
+
+        season = None
+        if args['<season>']:
+            season = self._get_season(args['<season>'])
+
+        careers = self.workers.map(
+            lambda player_id: self.playercareerstats.PlayerCareerStats(
+                player_id=player_id).get_normalized_dict(), player_ids)
+
+        rows = []
+        for player_id, stats in zip(player_ids, careers):
+            player = self.player_index.get(player_id)
+            if season:
+                logs = stats['SeasonTotalsPostSeason' if args['playoffs'] else 'SeasonTotalsRegularSeason']
+                logs = [log for log in logs if log['SEASON_ID'] == season]
+                # a traded player has a row per team plus a TOT row for the season
+                logs = [log for log in logs if log['TEAM_ABBREVIATION'] == 'TOT'] or logs
+            else:
+                logs = stats['CareerTotalsPostSeason' if args['playoffs'] else 'CareerTotalsRegularSeason']
+            if not logs:
+                rows.append([player['full_name'], f"no {season or 'career'} stats"])
+                continue
+            rows.append([player['full_name']] + self.season_fields(logs[0]) + [self.season_label(logs[0])])
+
+        # pad every column to its widest value so the rows line up
+        widths = [max(len(row[column]) for row in rows if column < len(row))
+                  for column in range(max(len(row) for row in rows))]
+        for row in rows:
+            yield '  '.join(field.ljust(width) for field, width in zip(row, widths)).rstrip()
+
+    @command(permission='view')
+    @offload
     def seasonstats(self, mask, target, args):
         """Season stats
 
@@ -181,7 +361,7 @@ class Plugin:
         name = ' '.join(args['<name>'])
         player_id = self._player_name_to_id(name)
         if not player_id:
-            yield "Player not found."
+            yield self._player_not_found(name)
             return
 
         if args['<season>']:
@@ -190,7 +370,7 @@ class Plugin:
             season = None
 
 
-        player = self.players.find_player_by_id(player_id)
+        player = self.player_index.get(player_id)
         stats = self.playercareerstats.PlayerCareerStats(
             player_id=player_id).get_normalized_dict()
         if args['all-star']:
@@ -225,6 +405,50 @@ class Plugin:
         return log_str
 
     @command(permission='view')
+    @offload
+    def leaders(self, mask, target, args):
+        """League leaders
+
+            %%leaders <stat>
+            %%leaders <stat> -s <season>
+            %%leaders <stat> -n <number>
+            %%leaders <stat> -s <season> -n <number>
+        """
+        stat = LeagueStats.stat(args['<stat>'])
+        if not stat:
+            yield f"Unknown stat {args['<stat>']}, try {', '.join(LEADER_STATS)}"
+            return
+        label, column, kind = stat
+        season = self.CURRENT_SEASON
+        if args['<season>']:
+            season = self._get_season(args['<season>'])
+            if not season:
+                yield "Season should look like 2020 or 2020-21."
+                return
+        number = 10
+        if args['<number>'] and args['<number>'].isdigit():
+            number = min(int(args['<number>']), 25)
+
+        # one call has every player's totals, so this answers every stat for the season
+        league = LeagueStats.from_response(self.leaguedashplayerstats.LeagueDashPlayerStats(
+            season=season, per_mode_detailed='Totals'))
+        rows, values = league.top(column, kind, number)
+        if not len(rows):
+            yield f"No {season} leaders yet."
+            return
+        leaders = []
+        for place, row in enumerate(rows, 1):
+            if kind == 'pct':
+                value = f"{values[row]:.3f}"[1:] if values[row] < 1 else f"{values[row]:.3f}"
+            elif kind == 'per_game':
+                value = f"{values[row]:.1f}"
+            else:
+                value = f"{values[row]:.0f}"
+            leaders.append(f"{place}. {league.names[row]} {league.teams[row]} {value}")
+        yield f"{season} {label} leaders: {' | '.join(leaders)}"
+
+    @command(permission='view')
+    @offload
     def seasonranks(self, mask, target, args):
         """Season ranks
 
@@ -233,7 +457,7 @@ class Plugin:
         name = ' '.join(args['<name>'])
         player_id = self._player_name_to_id(name)
         if not player_id:
-            yield "Player not found."
+            yield self._player_not_found(name)
             return
 
         if args['<season>']:
@@ -242,7 +466,7 @@ class Plugin:
             season = None
 
 
-        player = self.players.find_player_by_id(player_id)
+        player = self.player_index.get(player_id)
         stats = self.playercareerstats.PlayerCareerStats(
             player_id=player_id).get_normalized_dict()
         if args['playoffs']:
@@ -263,15 +487,18 @@ class Plugin:
 
 
     @command(permission='view')
+    @offload
     def stats(self, mask, target, args):
         """Game stats
 
-            %%stats (<name>... | -l <number_of_games> <name>... | -d <date> <name>...)
+            %%stats (<name>... | -l <number_of_games> [--split=<split>] <name>... | --split=<split> <name>... | -d <date> <name>...)
+
+            <split> is one of home, away, wins, losses, vs:<team> or month:<month>
         """
         name = ' '.join(args['<name>'])
         player_id = self._player_name_to_id(name)
         if not player_id:
-            yield "Player not found."
+            yield self._player_not_found(name)
             return
 
         player_info = self.commonplayerinfo.CommonPlayerInfo(
@@ -282,6 +509,7 @@ class Plugin:
         season = self.CURRENT_SEASON
         number_of_games = 1
         game_date = None
+        split = args['--split']
         if args['<date>']:
             game_date = args['<date>']
             game_datetime = parser.parse(game_date)
@@ -292,31 +520,24 @@ class Plugin:
             number_of_games = 0
         elif args['<number_of_games>']:
             number_of_games = args['<number_of_games>']
+        elif split:
+            number_of_games = 0
 
         if number_of_games == 1:
             day_offset = 0
             if datetime.now().hour >= 1 and datetime.now().hour < 8:
                 day_offset = -1
 
-            today_date = datetime.now(pytz.timezone('US/Pacific')).strftime("%m/%d/%Y")
-            scores = self.scoreboard.Scoreboard(game_date=today_date)
-
-            games = scores.get_normalized_dict()['GameHeader']
+            game = self.live.snapshot().game_for_team(team_id)
             live_game_id = None
             home_or_away = None
-            for game in games:
-                if game['HOME_TEAM_ID'] == team_id or game['VISITOR_TEAM_ID'] == team_id:
-                    if int(game['GAME_STATUS_ID']) >= 2:
-                        if game['HOME_TEAM_ID'] == team_id:
-                            home_or_away = "home"
-                        else:
-                            home_or_away = "away"
-
-                        live_game_id = game['GAME_ID']
-                        game_status = game['GAME_STATUS_TEXT']
-                        break
-                    else:
-                        break
+            if game and game.status >= 2:
+                if game.home.team_id == team_id:
+                    home_or_away = "home"
+                else:
+                    home_or_away = "away"
+
+                live_game_id = game.game_id
 
             log_str = None
             if live_game_id:
@@ -344,15 +565,26 @@ class Plugin:
                         yield log_str
                         return
 
-        logs = self.playergamelogs.PlayerGameLogs(player_id_nullable=player_id,
-                                                  last_n_games_nullable=number_of_games, date_to_nullable=game_date, date_from_nullable=game_date,
-                                                  season_nullable=season).get_normalized_dict()
-
-        if len(logs['PlayerGameLogs']) == 0:
+        last_n_games = number_of_games
+        if split:
+            last_n_games = None  # split the whole season, then take the newest games
+        response = self.playergamelogs.PlayerGameLogs(
+            **self._game_log_params(player_id, last_n_games, game_date, season))
+        logs = response.get_normalized_dict()
+        game_logs = GameLogs.from_response(response)
+        rows = game_logs.rows()
+        if split:
+            try:
+                rows = game_logs.rows(game_logs.split(split, self.team_index), last=int(number_of_games))
+            except SplitError as e:
+                yield str(e)
+                return
+
+        if len(rows) == 0:
             yield "No games found."
             return
-        elif len(logs['PlayerGameLogs']) == 1:
-            log = logs['PlayerGameLogs'][0]
+        elif len(rows) == 1:
+            log = logs['PlayerGameLogs'][rows[0]]
             name = log['PLAYER_NAME']
             matchup = opp_from_matchup(log['MATCHUP'])
             game_date = short_date(log['GAME_DATE'])
@@ -368,43 +600,44 @@ class Plugin:
             log_str += f" ({plus_minus}) ({game_date} {matchup})"
             yield log_str
         else:
-            log_count = len(logs['PlayerGameLogs'])
-            pts = fgm = fga = fg3m = fg3a = reb = ftm = fta = ast = blk = stl = tov = pf = minutes = 0
-            for log in logs['PlayerGameLogs']:
-                pts += log['PTS']
-                fgm += log['FGM']
-                fga += log['FGA']
-                ftm += log['FTM']
-                fta += log['FTA']
-                fg3m += log['FG3M']
-                fg3a += log['FG3A']
-                reb += log['REB']
-                ast += log['AST']
-                blk += log['BLK']
-                stl += log['STL']
-                tov += log['TOV']
-                pf += log['PF']
-                minutes += int(log['MIN'])
-            log_str = f"{logs['PlayerGameLogs'][0]['PLAYER_NAME']}  {avg(pts,log_count)} PT "
-            for stat in [['FG', fgm, fga], ['FT', ftm, fta], ['3P', fg3m, fg3a]]:
-                log_str += f" {pct(stat[1],stat[2])} of {avg(stat[2],log_count)} {stat[0]} "
-            for stat in [['RB', reb], ['AS', ast], ['BLK', blk], ['ST', stl], ['TO', tov], ['PF', pf], ['MN', minutes]]:
-                log_str += f" {avg(stat[1],log_count)} {stat[0]} "
-            log_str += f" (last {log_count} games)"
+            log_count = len(rows)
+            totals = game_logs.totals(rows)
+            log_str = f"{game_logs.name}  {avg(totals['PTS'],log_count)} PT "
+            for stat in [['FG', 'FGM', 'FGA'], ['FT', 'FTM', 'FTA'], ['3P', 'FG3M', 'FG3A']]:
+                log_str += f" {pct(totals[stat[1]],totals[stat[2]])} of {avg(totals[stat[2]],log_count)} {stat[0]} "
+            for stat in [['RB', 'REB'], ['AS', 'AST'], ['BLK', 'BLK'], ['ST', 'STL'], ['TO', 'TOV'], ['PF', 'PF'], ['MN', 'MIN']]:
+                log_str += f" {avg(totals[stat[1]],log_count)} {stat[0]} "
+            if not split:
+                log_str += f" (last {log_count} games)"
+            elif number_of_games:
+                log_str += f" (last {log_count} games, {split.replace(':', ' ')})"
+            else:
+                log_str += f" ({log_count} games, {split.replace(':', ' ')})"
             yield log_str
 
+    def _game_log_params(self, player_id, last_n_games=1, game_date=None, season=None):
+        # shared with the Prefetcher, so both land on the same cache entry
+        return {'player_id_nullable': player_id, 'last_n_games_nullable': last_n_games,
+                'date_to_nullable': game_date, 'date_from_nullable': game_date,
+                'season_nullable': season or self.CURRENT_SEASON}
+
+    def _team_log_params(self, team_id, number_of_games):
+        return {'season_nullable': self.CURRENT_SEASON, 'team_id_nullable': team_id,
+                'last_n_games_nullable': number_of_games}
+
     @command(permission='view')
+    @offload
     def team(self, mask, target, args):
         """Team
 
             %%team <name>
         """
         name = args['<name>']
-        teams = self.teams.find_teams_by_full_name(name)
-        if not teams[0]:
+        team_info = self.team_index.find(name)
+        if not team_info:
             yield "Team not found."
             return
-        team_id = teams[0]['id']
+        team_id = team_info['id']
         team = self.teamdetails.TeamDetails(
             team_id=team_id).get_normalized_dict()
         championships = [
@@ -430,7 +663,7 @@ class Plugin:
             str_history = f" ({','.join(list_history)}) "
 
         bg = team['TeamBackground'][0]
-        team_str = f"{teams[0]['full_name']}:"
+        team_str = f"{team_info['full_name']}:"
         capacity = ""
         if bg['ARENACAPACITY']:
             capacity = f" {int(bg['ARENACAPACITY']):,} "
@@ -438,12 +671,12 @@ class Plugin:
         yield team_str
 
     def _team_scores(self, team_name, number_of_games):
-        teams = self.teams.find_teams_by_full_name(team_name)
-        if not teams[0]:
+        team = self.team_index.find(team_name)
+        if not team:
             return "Team not found."
-        team_id = teams[0]['id']
-        logs = self.teamgamelogs.TeamGameLogs(season_nullable=self.CURRENT_SEASON, team_id_nullable=team_id,
-                                              last_n_games_nullable=number_of_games).get_normalized_dict()['TeamGameLogs']
+        team_id = team['id']
+        logs = self.teamgamelogs.TeamGameLogs(
+            **self._team_log_params(team_id, number_of_games)).get_normalized_dict()['TeamGameLogs']
         log_list = []
         for log in logs:
             print(log)
@@ -456,91 +689,21 @@ class Plugin:
         return log_str
 
     def _get_scoreboard(self, date_diff=None, score_date=None, topic: bool = False):
-        if score_date:
-            scores = self.scoreboard.Scoreboard(game_date=score_date)
-
-        else:
-            scores = self.scoreboard.Scoreboard(day_offset=date_diff)
-        games = scores.get_normalized_dict()['GameHeader']
-        score_text = ""
-        topic_text = ""
-        game_status = {}
-        for game in games:
-            if game['GAME_STATUS_ID'] == 1 or (topic and game['GAME_STATUS_ID'] == 2):
-                if score_text != "":
-                    score_text += " | "
-                    topic_text += " "
-                else:
-                    score_text = f"🏀{short_date(game['GAME_DATE_EST'])}: "
-                home_team_id = game["HOME_TEAM_ID"]
-                home_team = self.teams.find_team_name_by_id(home_team_id)
-                visitor_team_id = game["VISITOR_TEAM_ID"]
-                visitor_team = self.teams.find_team_name_by_id(visitor_team_id)
-                score_text += f"{home_team['nickname']} vs {visitor_team['nickname']} {game['GAME_STATUS_TEXT']}"
-                topic_text += f"{home_team['abbreviation']}@{visitor_team['abbreviation']}"
-                tv = game['NATL_TV_BROADCASTER_ABBREVIATION']
-                if tv:
-                    if tv.strip() == "TNT":
-                        score_text += f" \x0304,08\x02TNT\x02\x0f"
-                    else:
-                        score_text += f" \x02{game['NATL_TV_BROADCASTER_ABBREVIATION']}\x02"
-
-        if not date_diff or date_diff == 0:
-            board = self.live_scoreboard.ScoreBoard().games.get_dict()
-
-            for score in board:
-                if score['gameStatus'] != 1:
-                    if score_text != "":
-                        score_text += " | "
-                        topic_text += " "
-                    else:
-                        score_text = f"Today: "
-
-                    t1_name = score['homeTeam']['teamTricode']
-                    t1_pts = score['homeTeam']['score']
-                    t2_name = score['awayTeam']['teamTricode']
-                    t2_pts = score['awayTeam']['score']
-                    if score['gameLeaders']['homeLeaders']['points'] > score['gameLeaders']['awayLeaders']['points']:
-                        scorer_id = score['gameLeaders']['homeLeaders']['personId']
-                        stats = f" {score['gameLeaders']['homeLeaders']['points']}/{score['gameLeaders']['homeLeaders']['rebounds']}/{score['gameLeaders']['homeLeaders']['assists']}"
-                    else:
-                        scorer_id = score['gameLeaders']['awayLeaders']['personId']
-                        stats = f" {score['gameLeaders']['awayLeaders']['points']}/{score['gameLeaders']['awayLeaders']['rebounds']}/{score['gameLeaders']['awayLeaders']['assists']}"
-                    player = self.players.find_player_by_id(scorer_id)
-
-                    score_text += f"{t1_name} {t1_pts} {t2_name} {t2_pts}"
-                    if player:
-                        score_text += f" {shorten(player['last_name'],8)}{stats} "
-                    if score['gameStatus'] == 2:
-                        score_text += f" \x02{score['gameStatusText']}\x02"
-                    if t1_pts > t2_pts:
-                        topic_text += f"{t1_name}>{t2_name}"
-                    else:
-                        topic_text += f"{t1_name}<{t2_name}"
+        if score_date == pacific_today() or (not score_date and not date_diff):
+            day = self.live.snapshot()
         else:
-            linescore = scores.get_normalized_dict()['LineScore']
-            last_game_id = ""
-            for score in linescore:
-                if score['PTS']:
-                    if last_game_id != score['GAME_ID']:
-                        last_game_id = score['GAME_ID']
-                        t1_name = score['TEAM_ABBREVIATION']
-                        t1_pts = score['PTS']
-                    else:
-                        t2_name = score['TEAM_ABBREVIATION']
-                        t2_pts = score['PTS']
-                        if score_text != "":
-                            score_text += " | "
-                        else:
-                            score_text = f"🏀{short_date(score['GAME_DATE_EST'])}: "
-                        score_text += f"{t1_name} {t1_pts} {t2_name} {t2_pts}"
-                        if score['GAME_ID'] in game_status:
-                            score_text += f" \x02{game_status[score['GAME_ID']].replace(' - ','').strip()}\x02"
-        if topic:
-            return topic_text
-        return score_text
+            if score_date:
+                scores = self.scoreboard.Scoreboard(game_date=score_date)
+            else:
+                scores = self.scoreboard.Scoreboard(day_offset=date_diff)
+            day = GameDay.from_scoreboard(scores, self.team_index, self.player_index)
+        return render_scores(day, topic)
+
+    def _topic_scores(self, snapshot):
+        return render_scores(snapshot, topic=True)
 
     @command(permission='view')
+    @offload
     def scores(self, mask, target, args):
         """Scores
 
@@ -562,7 +725,7 @@ class Plugin:
             topic = True
         else:
             date_diff = 0
-            score_date = datetime.now(pytz.timezone('US/Pacific')).strftime("%m/%d/%Y")
+            score_date = pacific_today()
 
         #if date_diff == 0 and datetime.now().hour > 1 and datetime.now().hour < 8:
         #    date_diff = -1
@@ -579,6 +742,7 @@ class Plugin:
             yield self._get_scoreboard(date_diff=date_diff, score_date=score_date, topic=topic)
 
     @command(permission='view')
+    @offload
     def standings(self, mask, target, args):
         """Standings
 
@@ -590,33 +754,20 @@ class Plugin:
         if args['<east_or_west>'] == 'west':
             conf = "West"
 
-
-       
         season = self.CURRENT_SEASON
         if args['<season>']:
             season = self._get_season(args['<season>'])
-        
-        print(season)
-
-        standings = self.leaguestandings.LeagueStandings(
-            league_id="00", season=season, season_type="Regular Season").get_normalized_dict()['Standings']
 
-        standings = sorted(standings, key = lambda i: i['WinPCT'], reverse=True)
-        row_count = 1
         teams = []
-        for row in standings:
-            if not conf or row['Conference'] == conf:
-                win_pct = f"{row['WinPCT']:.3F}"[1:]
-                streak = str(row['strCurrentStreak']).replace(' ', '')
-                if streak == "None":
-                    streak = ""
-                else:
-                    streak = f"({streak})"
-                teams.append(
-                    f" {row_count}. {row['TeamName']} {row['WINS']}-{row['LOSSES']} {win_pct} {streak}")
-                row_count += 1
-                if row_count > 12:
-                    break
+        for place, row in self.standings_model.get(season).ranked(conf)[:12]:
+            win_pct = f"{row['WinPCT']:.3F}"[1:]
+            streak = str(row['strCurrentStreak']).replace(' ', '')
+            if streak == "None":
+                streak = ""
+            else:
+                streak = f"({streak})"
+            teams.append(
+                f" {place}. {row['TeamName']} {row['WINS']}-{row['LOSSES']} {win_pct} {streak}")
         if not conf:
             conf = "NBA"
         season_text = ""
@@ -626,6 +777,7 @@ class Plugin:
         yield f"{season_text}{conf} Standings: {' '.join(teams)}"
 
     @command(permission='view')
+    @offload
     def winchance(self, mask, target, args):
         """Win probability
 
@@ -633,118 +785,108 @@ class Plugin:
         """
 
         team_name = args['<team>']
-        teams = self.teams.find_teams_by_full_name(team_name)
-        if not teams[0]:
+        team = self.team_index.find(team_name)
+        if not team:
             yield "Team not found."
             return
-        team_id = teams[0]['id']
-        today_date = datetime.now(pytz.timezone('US/Pacific')).strftime("%m/%d/%Y")
-        scores = self.scoreboard.Scoreboard(game_date=today_date)
-
-        games = scores.get_normalized_dict()['GameHeader']
+        team_id = team['id']
+        game = self.live.snapshot().game_for_team(team_id)
         live_game_id = None
         home_or_away = None
-        score_text = ""
-        for game in games:
-            if game['HOME_TEAM_ID'] == team_id or game['VISITOR_TEAM_ID'] == team_id:
-                if game['HOME_TEAM_ID'] == team_id:
-                    home_or_away = "home"
-                    stat = 'HOME_PCT'
-                else:
-                    home_or_away = "away"
-                    stat = 'VISITOR_PCT'
-
-                live_game_id = game['GAME_ID']
-                game_status = game['GAME_STATUS_TEXT']
-
-                home_team_id = game["HOME_TEAM_ID"]
-                home_team = self.teams.find_team_name_by_id(home_team_id)
-                visitor_team_id = game["VISITOR_TEAM_ID"]
-                visitor_team = self.teams.find_team_name_by_id(visitor_team_id)
-                break
+        if game:
+            if game.home.team_id == team_id:
+                home_or_away = "home"
+            else:
+                home_or_away = "away"
+            live_game_id = game.game_id
         if not live_game_id:
             yield "Live game not found."
             return
 
-        prob = self.winprobabilitypbp.WinProbabilityPBP(game_id=live_game_id,run_type='each second')
-        prob = prob.get_normalized_dict()['WinProbPBP']
-        prob = sorted(prob, key=lambda x: x['HOME_PTS'] + x['VISITOR_PTS'])
-        win_chance = 0
-        i = 0
-        print(prob)
-        while win_chance == 0 and i < len(prob):
-            i = i +1
-            if prob[i*-1][stat]:
-                win_chance = prob[i*-1][stat]
+        tracker = self._wp_tracker(live_game_id)
+        tracker.update(self.winprobabilitypbp.WinProbabilityPBP(game_id=live_game_id,run_type='each second'))
+        if tracker.latest is None:
+            yield "No win probability yet."
+            return
+        home_pct, visitor_pct, home_pts, visitor_pts = tracker.latest
+        swing = tracker.swing(WIN_TREND)
         if home_or_away == "home":
-            str_team = home_team['nickname']
+            str_team = game.home.name
+            win_chance = home_pct
         else:
-            str_team = visitor_team['nickname']
-
-        msg = f" {str_team} win chance: {round(win_chance * 100,2)}% (calculated from score {home_team['nickname']} {prob[i*-1]['HOME_PTS']} - {visitor_team['nickname']} {prob[i*-1]['VISITOR_PTS']} )"
+            str_team = game.away.name
+            win_chance = visitor_pct
+            swing = -swing
+
+        msg = f" {str_team} win chance: {round(win_chance * 100,2)}% (calculated from score {game.home.name} {home_pts} - {game.away.name} {visitor_pts} )"
+        msg += f" | last {WIN_TREND // 60}m: {swing * 100:+.1f}%"
+        msg += f" | biggest lead: {game.home.name} {tracker.home_lead}, {game.away.name} {tracker.visitor_lead}"
+        msg += f" | {tracker.sparkline(home=home_or_away == 'home')}"
         yield msg
 
     @command(permission='view')
+    @offload
     def playbyplay(self, mask, target, args):
         """Play by play
 
-            %%playbyplay <team>
+            %%playbyplay <team> [<number_of_plays>]
         """
 
+        number_of_plays = 5
+        if args['<number_of_plays>'] and args['<number_of_plays>'].isdigit():
+            number_of_plays = min(int(args['<number_of_plays>']), RECENT_ACTIONS)
         team_name = args['<team>']
-        teams = self.teams.find_teams_by_full_name(team_name)
-        if not teams[0]:
+        team = self.team_index.find(team_name)
+        if not team:
             yield "Team not found."
             return
-        team_id = teams[0]['id']
-        today_date = datetime.now(pytz.timezone('US/Pacific')).strftime("%m/%d/%Y")
-        scores = self.scoreboard.Scoreboard(game_date=today_date)
-
-        games = scores.get_normalized_dict()['GameHeader']
+        team_id = team['id']
+        game = self.live.snapshot().game_for_team(team_id)
         live_game_id = None
-        home_or_away = None
         score_text = ""
-        for game in games:
-            if game['HOME_TEAM_ID'] == team_id or game['VISITOR_TEAM_ID'] == team_id:
-                if game['HOME_TEAM_ID'] == team_id:
-                    home_or_away = "home"
-                else:
-                    home_or_away = "away"
-
-                live_game_id = game['GAME_ID']
-                game_status = game['GAME_STATUS_TEXT']
-
-                home_team_id = game["HOME_TEAM_ID"]
-                home_team = self.teams.find_team_name_by_id(home_team_id)
-                visitor_team_id = game["VISITOR_TEAM_ID"]
-                visitor_team = self.teams.find_team_name_by_id(visitor_team_id)
-                break
+        if game:
+            live_game_id = game.game_id
         if not live_game_id:
             yield "Live game not found."
             return
-        end_period=4
-        start_period=1
-        pbp = self.playbyplay.PlayByPlay(game_id=live_game_id).get_dict()['game']['actions']
-        print(pbp)
+        tracker = self._pbp_tracker(live_game_id)
+        tracker.update(self.playbyplay.PlayByPlay(game_id=live_game_id))
         msg = ""
-        for i in [-5, -4, -3, -2, -1]:
-            if 'description' in pbp[i]:
-                msg += f" | {pbp[i]['description']} "
-                clock = pbp[i]['clock']
-                period = pbp[i]['period']
+        for action in tracker.last(number_of_plays):
+            if 'description' in action:
+                msg += f" | {action['description']} "
+                clock = action['clock']
+                period = action['period']
                 if period in [1,2,3,4]:
                     period = f"Q{period}"
                 # 'clock': 'PT08M17.00S',
                 clock = clock.replace('PT','').replace('M',':').replace('.00S','')
 
-                score_text = f"{home_team['nickname']} {pbp[i]['scoreHome']} - {visitor_team['nickname']} {pbp[i]['scoreAway']} ({clock} {period}) "
-                
+                score_text = f"{game.home.name} {action['scoreHome']} - {game.away.name} {action['scoreAway']} ({clock} {period}) "
+
         yield score_text + msg
 
+    def _pbp_tracker(self, game_id):
+        return self._game_tracker(self.pbp_trackers, PlayByPlayTracker, game_id)
+
+    def _wp_tracker(self, game_id):
+        return self._game_tracker(self.wp_trackers, WinProbabilityTracker, game_id)
+
+    def _game_tracker(self, trackers, tracker_class, game_id):
+        tracker = trackers.get(game_id)
+        if tracker is None:
+            # only today's games are worth tracking
+            today_games = self.live.snapshot().by_id
+            for old_id in [old_id for old_id in trackers if old_id not in today_games]:
+                del trackers[old_id]
+            tracker = trackers[game_id] = tracker_class(game_id)
+        return tracker
+
 
 
 
     @command(permission='view')
+    @offload
     def record(self, mask, target, args):
         """Team Record
 
@@ -756,72 +898,58 @@ class Plugin:
         else:
             season = self.CURRENT_SEASON
         team_name = args['<team>']
-        teams = self.teams.find_teams_by_full_name(team_name)
-        if not teams[0]:
+        team = self.team_index.find(team_name)
+        if not team:
             yield "Team not found."
             return
-        team_id = teams[0]['id']
-
-        standings = self.leaguestandings.LeagueStandings(
-            league_id="00", season=season, season_type="Regular Season").get_normalized_dict()['Standings']
-        record = ""
-        for row in standings:
-            if row['TeamID'] == team_id:
-                win_pct = f"{row['WinPCT']:.3F}"[1:]
-                streak = str(row['strCurrentStreak']).replace(' ', '')
-                if streak == "None":
-                    streak = ""
-                else:
-                    streak = f"({streak})"
-                if season == self.CURRENT_SEASON:
-                    streaks = f" {row['L10'].strip()} L10  {streak}"
-                else:
-                    streaks = ""
-                # <Ticket> Portland Blazers 10-10 (.500) 6-7 Conf 1-1 Div 9-1 Home 1-9 Away Lost 2
-                record = f"{row['WINS']}-{row['LOSSES']}  ({win_pct})  {row['ConferenceRecord'].strip()} Conf  {row['HOME'].strip()} Home  {row['ROAD'].strip()} Road  {streaks}"
-                break
+        team_id = team['id']
+
+        row = self.standings_model.get(season).team(team_id)
+        if not row:
+            yield f"No {season} record for the {team['full_name']}."
+            return
+        win_pct = f"{row['WinPCT']:.3F}"[1:]
+        streak = str(row['strCurrentStreak']).replace(' ', '')
+        if streak == "None":
+            streak = ""
+        else:
+            streak = f"({streak})"
+        if season == self.CURRENT_SEASON:
+            streaks = f" {row['L10'].strip()} L10  {streak}"
+        else:
+            streaks = ""
+        # <Ticket> Portland Blazers 10-10 (.500) 6-7 Conf 1-1 Div 9-1 Home 1-9 Away Lost 2
+        record = f"{row['WINS']}-{row['LOSSES']}  ({win_pct})  {row['ConferenceRecord'].strip()} Conf  {row['HOME'].strip()} Home  {row['ROAD'].strip()} Road  {streaks}"
         season_text = ""
         if season != self.CURRENT_SEASON:
             season_text = f" {season}"
 
-        yield f"{teams[0]['full_name']}{season_text} (#{row['PlayoffRank']} Playoff): {record}"
+        yield f"{team['full_name']}{season_text} (#{row['PlayoffRank']} Playoff): {record}"
 
     @command(permission='view')
+    @offload
     def lottery(self, mask, target, args):
         """Lottery
 
             %%lottery [<east_or_west>]
         """
-        standings = self.leaguestandings.LeagueStandings(
-            league_id="00", season=self.CURRENT_SEASON, season_type="Regular Season").get_normalized_dict()['Standings']
-
         conf = None
         if args['<east_or_west>'] == 'east':
             conf = "East"
         if args['<east_or_west>'] == 'west':
             conf = "West"
 
-        reverse = False 
-        if conf:
-            reverse = True
-        standings = sorted(standings, key = lambda i: i['WinPCT'], reverse=reverse)
-
-        row_count = 1
         teams = []
-        for row in standings:
-            if not conf or row['Conference'] == conf:
-                if not conf or (conf and row_count > 7):
-                    win_pct = f"{row['WinPCT']:.3F}"[1:]
-                    teams.append(
-                        f" {row_count}. {row['TeamName']} {row['WINS']}-{row['LOSSES']} {win_pct}")
-                if not conf and row_count >= 14:
-                    break
-                row_count += 1
+        for place, row in self.standings_model.get(self.CURRENT_SEASON).lottery_teams(conf)[:14]:
+            win_pct = f"{row['WinPCT']:.3F}"[1:]
+            teams.append(
+                f" {place}. {row['TeamName']} {row['WINS']}-{row['LOSSES']} {win_pct}")
         if not conf:
             conf = "NBA"
         yield f"{conf} Lottery: {'  '.join(teams)}"
 
     @command(permission='view')
+    @offload
     def roster(self, mask, target, args):
         """Team roster
 
@@ -833,11 +961,11 @@ class Plugin:
         else:
             season = self.CURRENT_SEASON
         team_name = args['<team>']
-        teams = self.teams.find_teams_by_full_name(team_name)
-        if not teams[0]:
+        team = self.team_index.find(team_name)
+        if not team:
             yield "Team not found."
             return
-        team_id = teams[0]['id']
+        team_id = team['id']
 
         roster = self.commonteamroster.CommonTeamRoster(
             team_id=team_id, season=season).get_normalized_dict()
@@ -856,44 +984,106 @@ class Plugin:
         if season != self.CURRENT_SEASON:
             season_text = f" {season}"
 
-        yield f"{teams[0]['full_name']}{season_text}: {str_coaches} {' '.join(list_players)}"
+        yield f"{team['full_name']}{season_text}: {str_coaches} {' '.join(list_players)}"
 
     @command(permission='view')
+    @offload
     def headtohead(self, mask, target, args):
         """Head to head games
 
             %%headtohead <team1> <team2>
+            %%headtohead -s <seasons> <team1> <team2>
+            [-headtohead -s 2010-2021 blazers lakers] all time unless a season or from-to range is given
         """
 
         team1_name = args['<team1>']
-        teams1 = self.teams.find_teams_by_full_name(team1_name)
-        if not teams1[0]:
+        team1 = self.team_index.find(team1_name)
+        if not team1:
             yield "Team 1 not found."
             return
-        team1_id = teams1[0]['id']
-        team1_name = teams1[0]['nickname']
+        team1_id = team1['id']
+        team1_name = team1['nickname']
 
         team2_name = args['<team2>']
-        teams2 = self.teams.find_teams_by_full_name(team2_name)
-        if not teams2[0]:
+        team2 = self.team_index.find(team2_name)
+        if not team2:
             yield "Team 2 not found."
             return
-        team2_name = teams2[0]['nickname']
-        team2_abbrev = teams2[0]['abbreviation']
-        games = self.leaguegamefinder.LeagueGameFinder(team_id_nullable=team1_id, season_type_nullable='Regular Season',
-                                                       season_nullable=self.CURRENT_SEASON).get_normalized_dict()['LeagueGameFinderResults']
-        # games = self.teamgamelog.TeamGameLog(team_id=team1_id,season=self.CURRENT_SEASON,season_type_all_star="Regular Season").get_normalized_dict()['TeamGameLog']
-        list_games = []
-        total_w = total_l = 0
-        for game in games:
-            if game['MATCHUP'][-3:] == team2_abbrev:
-                pts = game['PTS']
-                o_pts = int(game['PTS'] + game['PLUS_MINUS'])
-                if game['WL'] == 'W':
-                    total_w += 1
-                else:
-                    total_l += 1
+        team2_name = team2['nickname']
+
+        seasons = self._season_range(args['<seasons>'])
+        if not seasons:
+            yield "Seasons should look like 2015 or 2010-2021."
+            return
+        loading = self._load_games(seasons)
+        games = self.games.series(team1_id, team2['id'], seasons[0], seasons[-1])
 
-                list_games.append(
-                    f"{h2h_date(game['GAME_DATE'])} {opp_from_matchup(game['MATCHUP'])} {game['WL']} {pts}-{o_pts}")
-        yield f"{team1_name} vs {team2_name} {total_w}-{total_l} | {' | '.join(list_games)}"
+        total_w = sum(1 for game in games if game[2] == 'W')
+        total_l = len(games) - total_w
+        list_games = []
+        for game_date, matchup, wl, pts, o_pts in games[:10]:
+            list_games.append(
+                f"{h2h_date(game_date, year=len(seasons) > 1)} {opp_from_matchup(matchup)} {wl} {pts}-{o_pts}")
+        if len(seasons) == 1:
+            span = "" if seasons[0] == self.CURRENT_SEASON else f" {seasons[0]}"
+        else:
+            span = f" {seasons[0]} to {seasons[-1]}"
+        if loading:
+            span += f" (still loading {loading} seasons)"
+        yield f"{team1_name} vs {team2_name}{span} {total_w}-{total_l} | {' | '.join(list_games)}"
+
+    def _season_range(self, text):
+        """Seasons for -headtohead -s: all time, one season, or from-to."""
+        last = int(self.CURRENT_SEASON[:4])
+        if not text:
+            first = FIRST_SEASON
+        else:
+            first_text, _, last_text = text.partition('-')
+            first_season = self._get_season(first_text)
+            if not first_season:
+                return None
+            # nothing has been played past the current season
+            first = min(int(first_season[:4]), last)
+            # 2010-11 is one season, 2010-2021 a range
+            if last_text and last_text != first_season[-2:]:
+                last_season = self._get_season(last_text)
+                if not last_season:
+                    return None
+                last = min(int(last_season[:4]), last)
+            else:
+                last = first
+        return [self._get_season(str(year)) for year in range(first, last + 1)]
+
+    def _load_games(self, seasons):
+        """Bring the GameTable up to date for seasons. A few missing completed
+        seasons are loaded right away, more than that in the background.
+        Returns how many are still loading."""
+        stored = self.games.seasons()
+        # only seasons before the current one are finished and stored complete
+        missing = [season for season in seasons
+                   if season[:4] < self.CURRENT_SEASON[:4] and not stored.get(season, (False,))[0]]
+        if len(missing) > BACKFILL_INLINE:
+            if self.backfill is None or self.backfill.done():
+                self.backfill = self.workers.fanout.submit(self._backfill_games, missing)
+        else:
+            self._backfill_games(missing)
+            missing = []
+        if self.CURRENT_SEASON in seasons:
+            complete, updated, last_date = stored.get(self.CURRENT_SEASON, (False, 0, None))
+            if time.time() - updated > GAMES_REFRESH:
+                self._fetch_games(self.CURRENT_SEASON, complete=False, since=last_date)
+        return len(missing)
+
+    def _backfill_games(self, seasons):
+        for season in seasons:
+            self._fetch_games(season, complete=True)
+
+    def _fetch_games(self, season, complete, since=None):
+        params = {'league_id_nullable': '00', 'season_nullable': season,
+                  'season_type_nullable': 'Regular Season'}
+        if since:
+            # the last stored day again, in case it was fetched mid-slate
+            params['date_from_nullable'] = datetime.strptime(since, "%Y-%m-%d").strftime("%m/%d/%Y")
+        # kept in the GameTable, not the response cache or HistoryStore
+        results = self.leaguegamefinder.LeagueGameFinder.uncached(**params)
+        self.games.add(season, results.get_normalized_dict()['LeagueGameFinderResults'], complete)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import datetime, timezone
+
+from dateutil import parser
+
+from scores_gameday import FINAL, LIVE, PREGAME
+
+log = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Warms the cache for each channel's home team around its games.
+
+    ``home_teams`` pairs channels with teams (``${#}ripcity:blazers``).
+    ``prefetch_lead`` seconds before tip-off the roster, each player's info
+    and last game log, the team's recent scores and the standings are
+    fetched and held for ``prefetch_hold`` seconds, or until the game goes
+    final. While the game is on, the box score, play by play and win
+    probability are refreshed after every live poll, so -stats, -playbyplay
+    and -winchance answer from the cache.
+
+    A LivePoller listener; the fetching itself runs on the fan-out pool,
+    one round at a time.
+    """
+
+    def __init__(self, plugin, config=None):
+        config = config or {}
+        self.plugin = plugin
+        self.lead = float(config.get('prefetch_lead', 10 * 60))
+        self.hold = float(config.get('prefetch_hold', 4 * 60 * 60))
+        self.home_teams = {}  # channel -> team
+        for pair in config.get('home_teams', '').split():
+            channel, _, name = pair.rpartition(':')
+            team = plugin.team_index.find(name)
+            if not channel or not team:
+                log.warning("home_teams: can't use %r", pair)
+                continue
+            self.home_teams[channel] = team
+        self.warmed = {}  # game id -> last status prefetched for
+        self.running = None  # Future of the round in progress
+
+    def teams(self):
+        return list({team['id']: team for team in self.home_teams.values()}.values())
+
+    def __call__(self, snapshot):
+        if self.running is not None and not self.running.done():
+            return  # still on the last round, the next poll picks this up
+        now = datetime.now(timezone.utc)
+        jobs = []
+        for team in self.teams():
+            game = snapshot.game_for_team(team['id'])
+            if game is None:
+                continue
+            warmed = self.warmed.get(game.game_id)
+            if game.status == PREGAME:
+                if warmed is None and game.tipoff and \
+                        (parser.parse(game.tipoff) - now).total_seconds() <= self.lead:
+                    jobs.append((self.pregame, team, game))
+            elif game.status == LIVE:
+                if warmed is None:  # started (or reloaded) after tip-off
+                    jobs.append((self.pregame, team, game))
+                jobs.append((self.live, team, game))
+            elif game.status == FINAL and warmed in (PREGAME, LIVE):
+                jobs.append((self.final, team, game))
+        if jobs:
+            self.running = self.plugin.workers.fanout.submit(self._run, jobs)
+
+    def _run(self, jobs):
+        for job, team, game in jobs:
+            try:
+                job(team, game)
+            except Exception as e:
+                log.warning("prefetch for %s failed: %r", team['nickname'], e)
+            else:
+                self.warmed[game.game_id] = game.status
+
+    def _players(self, team):
+        plugin = self.plugin
+        roster = plugin.commonteamroster.CommonTeamRoster(
+            team_id=team['id'], season=plugin.CURRENT_SEASON)
+        return [player['PLAYER_ID'] for player in
+                roster.get_normalized_dict()['CommonTeamRoster']]
+
+    def pregame(self, team, game):
+        plugin = self.plugin
+        for player_id in self._players(team):
+            plugin.commonplayerinfo.CommonPlayerInfo(player_id=player_id)
+            # last night's logs won't change before this game is over
+            plugin.playergamelogs.PlayerGameLogs.warm(
+                self.hold, **plugin._game_log_params(player_id))
+        plugin.teamgamelogs.TeamGameLogs.warm(
+            self.hold, **plugin._team_log_params(team['id'], plugin.TEAM_SCORES_GAMES))
+        plugin.standings_model.get(plugin.CURRENT_SEASON)
+
+    def live(self, team, game):
+        plugin = self.plugin
+        # good until the next poll comes round to refresh them again
+        ttl = plugin.live.live_interval * 2
+        plugin.boxscore.BoxScore.warm(ttl, game_id=game.game_id)
+        plugin._pbp_tracker(game.game_id).update(
+            plugin.playbyplay.PlayByPlay.warm(ttl, game_id=game.game_id))
+        plugin._wp_tracker(game.game_id).update(
+            plugin.winprobabilitypbp.WinProbabilityPBP.warm(
+                ttl, game_id=game.game_id, run_type='each second'))
+
+    def final(self, team, game):
+        plugin = self.plugin
+        for player_id in self._players(team):
+            plugin.playergamelogs.PlayerGameLogs.invalidate(**plugin._game_log_params(player_id))
+        plugin.teamgamelogs.TeamGameLogs.invalidate(
+            **plugin._team_log_params(team['id'], plugin.TEAM_SCORES_GAMES))
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import threading
+import time
+
+# priority classes, lowest goes first
+LIVE = 0
+CURRENT = 1
+HISTORICAL = 2
+
+LIVE_ENDPOINTS = ('BoxScore', 'PlayByPlay', 'ScoreBoard', 'Scoreboard', 'WinProbabilityPBP')
+HISTORICAL_ENDPOINTS = ('LeagueGameFinder', 'PlayerCareerStats')
+
+BUSY_MESSAGE = "stats.nba.com is busy right now, please try again in a minute."
+DOWN_MESSAGE = "stats.nba.com isn't answering, please try again in a few minutes."
+
+
+class UpstreamBusy(Exception):
+    pass
+
+
+class UpstreamDown(UpstreamBusy):
+    pass
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host that keeps failing.
+
+    ``failures`` failed requests in a row open the breaker, and requests are
+    refused on the spot for ``reset`` seconds. Then one trial request is let
+    through: the breaker closes if it works and stays open another
+    ``reset`` seconds if not.
+    """
+
+    def __init__(self, failures=5, reset=30, clock=time.monotonic):
+        self.failures = failures
+        self.reset = reset
+        self.clock = clock
+        self.streak = 0
+        self.trips = 0
+        self._opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        return self._opened is not None
+
+    def due(self):
+        """Open, but ready for a trial request."""
+        with self._lock:
+            return (self._opened is not None and not self._trial
+                    and self.clock() >= self._opened + self.reset)
+
+    def allow(self):
+        with self._lock:
+            if self._opened is None:
+                return True
+            if self._trial or self.clock() < self._opened + self.reset:
+                return False
+            self._trial = True
+            return True
+
+    def record(self, failed):
+        with self._lock:
+            self._trial = False
+            if not failed:
+                self.streak = 0
+                self._opened = None
+                return
+            self.streak += 1
+            if self._opened is None and self.streak >= self.failures:
+                self.trips += 1
+            if self._opened is not None or self.streak >= self.failures:
+                self._opened = self.clock()
+
+
+class RateLimiter:
+    """Token bucket for one upstream host where waiters are served in
+    priority order. Anything but LIVE is shed once ``max_queue`` requests
+    are already waiting."""
+
+    def __init__(self, rate, burst, max_queue, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.clock = clock
+        self.tokens = burst
+        self.shed = 0
+        self._updated = clock()
+        self._waiting = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority, max_wait=None):
+        with self._cond:
+            if priority != LIVE and len(self._waiting) >= self.max_queue:
+                self.shed += 1
+                raise UpstreamBusy(BUSY_MESSAGE)
+            ticket = (priority, next(self._order))
+            heapq.heappush(self._waiting, ticket)
+            deadline = None if max_wait is None else self.clock() + max_wait
+            try:
+                while True:
+                    self._refill()
+                    if self._waiting[0] == ticket and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = (1 - self.tokens) / self.rate
+                    if deadline is not None:
+                        left = deadline - self.clock()
+                        if left <= 0:
+                            self.shed += 1
+                            raise UpstreamBusy(BUSY_MESSAGE)
+                        wait = left if wait is None else min(wait, left)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def queued(self):
+        return len(self._waiting)
+
+
+class OutboundScheduler:
+    """Paces requests per upstream host.
+
+    stats.nba.com and cdn.nba.com each get a bucket of ``rate_<host>``
+    requests a second with bursts of ``burst_<host>`` (host is ``stats`` or
+    ``live``). Live game endpoints jump the queue, completed seasons and
+    career stats wait behind everything else, and a request that can't get
+    out within ``max_wait`` seconds is given up on. Each host also has a
+    CircuitBreaker (``breaker_failures``, ``breaker_reset``).
+    """
+
+    def __init__(self, policy, config=None):
+        config = config or {}
+        self.policy = policy
+        self.max_wait = float(config.get('max_wait', 10))
+        max_queue = int(config.get('max_queue', 20))
+        self.hosts = {
+            'stats': RateLimiter(float(config.get('rate_stats', 2)),
+                                 int(config.get('burst_stats', 5)), max_queue),
+            'live': RateLimiter(float(config.get('rate_live', 5)),
+                                int(config.get('burst_live', 10)), max_queue),
+        }
+        self.breakers = {
+            host: CircuitBreaker(int(config.get('breaker_failures', 5)),
+                                 float(config.get('breaker_reset', 30)))
+            for host in self.hosts
+        }
+
+    @staticmethod
+    def host_for(endpoint):
+        return 'live' if endpoint.__module__.startswith('nba_api.live') else 'stats'
+
+    def priority(self, name, params):
+        if name in LIVE_ENDPOINTS:
+            return LIVE
+        if name in HISTORICAL_ENDPOINTS or self.policy.is_historical(params):
+            return HISTORICAL
+        return CURRENT
+
+    def breaker(self, endpoint):
+        return self.breakers[self.host_for(endpoint)]
+
+    def acquire(self, endpoint, params):
+        host = self.host_for(endpoint)
+        breaker = self.breakers[host]
+        if breaker.is_open() and not breaker.due():
+            raise UpstreamDown(DOWN_MESSAGE)
+        self.hosts[host].acquire(self.priority(endpoint.__name__, params), self.max_wait)
+        if not breaker.allow():
+            raise UpstreamDown(DOWN_MESSAGE)
+
+    def record(self, endpoint, failed):
+        self.breaker(endpoint).record(failed)
+
+    def stats(self):
+        stats = {}
+        for host, limiter in self.hosts.items():
+            stats[f"{host}_queued"] = limiter.queued()
+            stats[f"{host}_shed"] = limiter.shed
+            stats[f"{host}_open"] = int(self.breakers[host].is_open())
+            stats[f"{host}_trips"] = self.breakers[host].trips
+        return stats
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# statuses that mean the egress is being throttled or blocked
+BLOCKED = (403, 429)
+
+
+def unhealthy(status):
+    """Whether a response status says the host (or our way to it) is in
+    trouble, as opposed to the request being wrong."""
+    return status in BLOCKED or status >= 500
+
+
+class ProxyHealth:
+
+    def __init__(self, url):
+        self.url = url
+        self.calls = 0
+        self.failures = 0
+        self.streak = 0        # consecutive failures
+        self.latency = None    # moving average, seconds
+        self.ejected_until = 0
+
+    @property
+    def name(self):
+        # host:port only, the url may carry credentials
+        parts = urlsplit(self.url)
+        return f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+
+
+class ProxyPool:
+    """Round robin over the configured proxies.
+
+    A proxy that fails ``max_failures`` times in a row is left out for
+    ``eject_seconds``. If every proxy is out, the one due back first is used
+    rather than going out directly.
+    """
+
+    def __init__(self, urls, max_failures=3, eject_seconds=300, clock=time.monotonic):
+        self.proxies = [ProxyHealth(url) for url in urls]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.clock = clock
+        self._cycle = itertools.cycle(self.proxies)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            now = self.clock()
+            for _ in self.proxies:
+                proxy = next(self._cycle)
+                if proxy.ejected_until <= now:
+                    return proxy
+            return min(self.proxies, key=lambda proxy: proxy.ejected_until)
+
+    def report(self, proxy, seconds, failed):
+        with self._lock:
+            proxy.calls += 1
+            if failed:
+                proxy.failures += 1
+                proxy.streak += 1
+                if proxy.streak >= self.max_failures:
+                    proxy.ejected_until = self.clock() + self.eject_seconds
+                    proxy.streak = 0
+                return
+            proxy.streak = 0
+            proxy.latency = seconds if proxy.latency is None else .8 * proxy.latency + .2 * seconds
+
+    def summary(self):
+        now = self.clock()
+        lines = []
+        with self._lock:
+            for proxy in self.proxies:
+                line = f"{proxy.name} {proxy.calls}x"
+                if proxy.latency is not None:
+                    line += f" avg {proxy.latency * 1000:.0f}ms"
+                if proxy.failures:
+                    line += f" {proxy.failures} failed"
+                if proxy.ejected_until > now:
+                    line += f" ejected {proxy.ejected_until - now:.0f}s"
+                lines.append(line)
+        return lines
+
+
+class PooledSession(requests.Session):
+    """Keep-alive session shared by every endpoint call, so connections (and
+    TLS) to stats.nba.com and cdn.nba.com are reused. Requests go through the
+    next healthy proxy from ``proxies`` unless the caller picked one.
+
+    Blocked and 5xx responses are raised as HTTPError, nba_api would only
+    fail later trying to parse the body."""
+
+    def __init__(self, pool_size=8, proxies=None):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.proxy_pool = proxies
+
+    def request(self, method, url, **kwargs):
+        if self.proxy_pool is None or not self.proxy_pool.proxies or kwargs.get('proxies'):
+            return self._checked(super().request(method, url, **kwargs))
+        proxy = self.proxy_pool.next()
+        kwargs['proxies'] = {'http': proxy.url, 'https': proxy.url}
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.proxy_pool.report(proxy, time.perf_counter() - start, True)
+            raise
+        failed = unhealthy(response.status_code)
+        self.proxy_pool.report(proxy, time.perf_counter() - start, failed)
+        return self._checked(response)
+
+    @staticmethod
+    def _checked(response):
+        if unhealthy(response.status_code):
+            response.raise_for_status()
+        return response
+
+
+def install_session(config=None, pool_size=8):
+    """Build a PooledSession from the bot config and hand it to nba_api.
+
+    ``proxies`` is a whitespace or comma separated list of proxy urls,
+    ``proxy_max_failures`` and ``proxy_eject_seconds`` control ejection and
+    ``http_pool_size`` caps the kept-alive connections per host, ``pool_size``
+    when unset: enough for every command worker and fan-out thread at once.
+    """
+    config = config or {}
+    urls = config.get('proxies', '').replace(',', ' ').split()
+    pool = ProxyPool(urls, int(config.get('proxy_max_failures', 3)),
+                     float(config.get('proxy_eject_seconds', 300))) if urls else None
+    session = PooledSession(int(config.get('http_pool_size', pool_size)), pool)
+
+    from nba_api.library import http
+    if hasattr(http.NBAHTTP, 'set_session'):
+        from nba_api.live.nba.library.http import NBALiveHTTP
+        from nba_api.stats.library.http import NBAStatsHTTP
+        for client in (http.NBAHTTP, NBAStatsHTTP, NBALiveHTTP):
+            client.set_session(session)
+    else:
+        # older nba_api calls requests.get straight from library/http.py
+        http.requests = SimpleNamespace(get=session.get)
+    return session
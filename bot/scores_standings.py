@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import threading
+
+CONFERENCES = ('East', 'West')
+LOTTERY_AFTER_SEED = 7  # -lottery <conf> lists seed 8 and worse
+
+
+def _league_order(row):
+    return (-row['WinPCT'], -row['WINS'])
+
+
+def _seed_order(row):
+    # PlayoffRank already has the NBA's tiebreakers applied
+    return (row['PlayoffRank'] or 99, -row['WinPCT'], -row['WINS'])
+
+
+class Standings:
+    """A season's LeagueStandings rows, ordered once for every command."""
+
+    def __init__(self, season, rows):
+        self.season = season
+        self.rows = rows
+        self.by_team = {row['TeamID']: row for row in rows}
+        self.league = sorted(rows, key=_league_order)
+        self.conference = {
+            conf: sorted((row for row in rows if row['Conference'] == conf), key=_seed_order)
+            for conf in CONFERENCES
+        }
+        # worst record first, the order lottery odds go in
+        self.lottery = sorted(rows, key=lambda row: (row['WinPCT'], row['WINS']))
+
+    def team(self, team_id):
+        return self.by_team.get(team_id)
+
+    def ranked(self, conf=None):
+        """(rank, row) pairs for the league, or one conference by seed."""
+        return list(enumerate(self.conference[conf] if conf else self.league, 1))
+
+    def lottery_teams(self, conf=None):
+        """(rank, row) pairs: the league's worst records first, or a
+        conference's teams after LOTTERY_AFTER_SEED in seed order."""
+        if conf:
+            return self.ranked(conf)[LOTTERY_AFTER_SEED:]
+        return list(enumerate(self.lottery, 1))
+
+
+class StandingsModel:
+    """Standings per season, rebuilt only when LeagueStandings returns a new
+    response. Also a LivePoller listener: when another game goes final the
+    current season's response is dropped from the cache so the next command
+    picks up the new records."""
+
+    def __init__(self, endpoints, current_season):
+        self.endpoints = endpoints  # leaguestandings module, through the cache
+        self.current_season = current_season
+        self._built = {}  # season -> (response, Standings)
+        self._finals = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _params(season):
+        return {'league_id': '00', 'season': season, 'season_type': 'Regular Season'}
+
+    def get(self, season):
+        response = self.endpoints.LeagueStandings(**self._params(season))
+        with self._lock:
+            built = self._built.get(season)
+            if built is None or built[0] is not response:
+                rows = response.get_normalized_dict()['Standings']
+                built = self._built[season] = (response, Standings(season, rows))
+        return built[1]
+
+    def __call__(self, snapshot):
+        finals = snapshot.finals()
+        if self._finals is not None and finals > self._finals:
+            self.endpoints.LeagueStandings.invalidate(**self._params(self.current_season))
+        self._finals = finals
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import calendar
+
+import numpy as np
+
+from scores_helpers import memo_by_response
+
+# PlayerGameLogs columns summed by -stats, in array column order
+STAT_COLUMNS = ('PTS', 'FGM', 'FGA', 'FTM', 'FTA', 'FG3M', 'FG3A', 'REB', 'OREB',
+                'AST', 'BLK', 'STL', 'TOV', 'PF', 'MIN', 'PLUS_MINUS')
+COLUMN = {name: i for i, name in enumerate(STAT_COLUMNS)}
+
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+
+
+class SplitError(ValueError):
+    pass
+
+
+class GameLogs:
+    """PlayerGameLogs rows as columns: one float matrix of stats plus the
+    arrays splits are taken on. Rows keep upstream order, newest first."""
+
+    def __init__(self, logs):
+        self.name = logs[0]['PLAYER_NAME'] if logs else None
+        self.stats = np.array([[log[column] or 0 for column in STAT_COLUMNS] for log in logs],
+                              dtype=float).reshape(len(logs), len(STAT_COLUMNS))
+        # -stats has always counted whole minutes per game
+        self.stats[:, COLUMN['MIN']] = np.trunc(self.stats[:, COLUMN['MIN']])
+        self.home = np.array(['@' not in log['MATCHUP'] for log in logs], dtype=bool)
+        self.win = np.array([log['WL'] == 'W' for log in logs], dtype=bool)
+        self.opponent = np.array([log['MATCHUP'][-3:] for log in logs])
+        self.month = np.array([int(log['GAME_DATE'][5:7]) for log in logs], dtype=int)
+
+    @classmethod
+    @memo_by_response
+    def from_response(cls, response):
+        """GameLogs for a PlayerGameLogs endpoint, built once per response."""
+        return cls(response.get_normalized_dict()['PlayerGameLogs'])
+
+    def __len__(self):
+        return len(self.stats)
+
+    def split(self, split, team_index=None):
+        """Boolean row mask for a split: home, away, wins, losses,
+        vs:<team> or month:<jan|1>."""
+        split = split.lower()
+        if split == 'home':
+            return self.home
+        if split == 'away':
+            return ~self.home
+        if split in ('wins', 'w'):
+            return self.win
+        if split in ('losses', 'l'):
+            return ~self.win
+        kind, _, value = split.partition(':')
+        if kind == 'vs' and value:
+            team = team_index.find(value) if team_index else None
+            abbreviation = team['abbreviation'] if team else value.upper()
+            return self.opponent == abbreviation
+        if kind == 'month' and value:
+            month = MONTHS.get(value[:3]) or (int(value) if value.isdigit() else None)
+            if not month:
+                raise SplitError(f"Unknown month {value}")
+            return self.month == month
+        raise SplitError(f"Unknown split {split}, try home, away, wins, losses, vs:<team> or month:<month>")
+
+    def rows(self, mask=None, last=None):
+        """Row indexes selected by mask, cut to the newest ``last`` games."""
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if last:
+            rows = rows[:last]
+        return rows
+
+    def totals(self, rows):
+        return dict(zip(STAT_COLUMNS, self.stats[rows].sum(axis=0).tolist()))
+
+
+# -leaders stat name -> (label, column, how it's ranked)
+# per_game: total / GP, pct: made / attempted, total: season total
+LEADER_STATS = {
+    'pts': ('PPG', 'PTS', 'per_game'),
+    'reb': ('RPG', 'REB', 'per_game'),
+    'oreb': ('OREB', 'OREB', 'per_game'),
+    'dreb': ('DREB', 'DREB', 'per_game'),
+    'ast': ('APG', 'AST', 'per_game'),
+    'stl': ('SPG', 'STL', 'per_game'),
+    'blk': ('BPG', 'BLK', 'per_game'),
+    'tov': ('TOV', 'TOV', 'per_game'),
+    'min': ('MPG', 'MIN', 'per_game'),
+    '3pm': ('3PM', 'FG3M', 'per_game'),
+    'fg%': ('FG%', 'FGM', 'pct'),
+    'ft%': ('FT%', 'FTM', 'pct'),
+    '3p%': ('3P%', 'FG3M', 'pct'),
+    '+/-': ('+/-', 'PLUS_MINUS', 'total'),
+    'dd': ('DD', 'DD2', 'total'),
+    'td': ('TD', 'TD3', 'total'),
+}
+LEADER_ALIASES = {
+    'points': 'pts', 'rebounds': 'reb', 'assists': 'ast', 'steals': 'stl', 'blocks': 'blk',
+    'turnovers': 'tov', 'minutes': 'min', 'threes': '3pm', 'fg': 'fg%', 'ft': 'ft%',
+    '3p': '3p%', 'pm': '+/-', 'plusminus': '+/-', 'doubles': 'dd', 'triples': 'td',
+}
+ATTEMPTS = {'FGM': 'FGA', 'FTM': 'FTA', 'FG3M': 'FG3A'}
+# the league's qualifying minimums over 82 games, prorated to games played so far
+MIN_GAMES = 58
+MIN_MADE = {'FGM': 300, 'FTM': 125, 'FG3M': 82}
+LEADER_COLUMNS = ('GP', 'MIN', 'PTS', 'REB', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV',
+                  'FGM', 'FGA', 'FTM', 'FTA', 'FG3M', 'FG3A', 'PLUS_MINUS', 'DD2', 'TD3')
+
+
+class LeagueStats:
+    """Season totals for every player from one LeagueDashPlayerStats call,
+    one numpy column per stat, for -leaders."""
+
+    def __init__(self, rows):
+        self.names = [row['PLAYER_NAME'] for row in rows]
+        self.teams = [row['TEAM_ABBREVIATION'] for row in rows]
+        self.columns = {column: np.array([row[column] or 0 for row in rows], dtype=float)
+                        for column in LEADER_COLUMNS}
+        self.max_games = self.columns['GP'].max() if rows else 0
+
+    @classmethod
+    @memo_by_response
+    def from_response(cls, response):
+        """LeagueStats for a LeagueDashPlayerStats endpoint, built once per response."""
+        return cls(response.get_normalized_dict()['LeagueDashPlayerStats'])
+
+    @staticmethod
+    def stat(name):
+        name = name.lower()
+        return LEADER_STATS.get(LEADER_ALIASES.get(name, name))
+
+    def values(self, column, kind):
+        """(values, qualified mask) for ranking on a column."""
+        games = self.columns['GP']
+        scale = self.max_games / 82
+        total = self.columns[column]
+        if kind == 'pct':
+            attempts = self.columns[ATTEMPTS[column]]
+            values = np.divide(total, attempts, out=np.zeros_like(total), where=attempts > 0)
+            return values, total >= MIN_MADE[column] * scale
+        if kind == 'per_game':
+            values = np.divide(total, games, out=np.zeros_like(total), where=games > 0)
+            return values, games >= MIN_GAMES * scale
+        return total, games > 0
+
+    def top(self, column, kind, count):
+        """Indexes of the ``count`` best qualified players, best first."""
+        values, qualified = self.values(column, kind)
+        rows = np.flatnonzero(qualified)
+        if not len(rows):
+            return rows, values
+        count = min(count, len(rows))
+        # partial sort: only the top count are ordered
+        best = rows[np.argpartition(-values[rows], count - 1)[:count]]
+        return best[np.argsort(-values[best], kind='stable')], values
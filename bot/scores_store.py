@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+import time
+
+from scores_cache import params_json
+
+STORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db')
+
+
+class HistoryStore:
+    """On disk store of upstream responses that will never change again
+    (completed seasons, retired players), keyed by endpoint and parameters.
+
+    Bodies are kept exactly as stats.nba.com / cdn.nba.com sent them so they
+    can be loaded back into the nba_api endpoint classes.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                endpoint TEXT NOT NULL,
+                params TEXT NOT NULL,
+                body TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                PRIMARY KEY (endpoint, params)
+            )""")
+        self._db.commit()
+
+    def get(self, endpoint, params):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body FROM responses WHERE endpoint = ? AND params = ?",
+                (endpoint, params_json(params))).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, endpoint, params, body):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (endpoint, params_json(params), body, time.time()))
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {'responses': count, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class GameTable:
+    """Regular season games for -headtohead, one row per team per game,
+    keyed on (team, opponent, season) so a series is one index range scan.
+
+    Completed seasons are loaded once; the current one is topped up from
+    the last game date stored.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                team_id INTEGER NOT NULL,
+                opponent_id INTEGER NOT NULL,
+                season TEXT NOT NULL,
+                game_id TEXT NOT NULL,
+                game_date TEXT NOT NULL,
+                matchup TEXT NOT NULL,
+                wl TEXT NOT NULL,
+                pts INTEGER NOT NULL,
+                opponent_pts INTEGER NOT NULL,
+                PRIMARY KEY (team_id, opponent_id, season, game_id)
+            ) WITHOUT ROWID""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS game_seasons (
+                season TEXT PRIMARY KEY,
+                complete INTEGER NOT NULL,
+                updated REAL NOT NULL,
+                last_date TEXT
+            )""")
+        self._db.commit()
+
+    def add(self, season, results, complete):
+        """Store LeagueGameFinderResults rows for a season, pairing each
+        team's row with its opponent's by game id."""
+        by_game = {}
+        for row in results:
+            if row['WL']:  # no result yet
+                by_game.setdefault(row['GAME_ID'], []).append(row)
+        games = []
+        for rows in by_game.values():
+            if len(rows) != 2:
+                continue
+            for row, opponent in (rows, rows[::-1]):
+                games.append((row['TEAM_ID'], opponent['TEAM_ID'], season, row['GAME_ID'],
+                              row['GAME_DATE'], row['MATCHUP'], row['WL'], row['PTS'],
+                              opponent['PTS']))
+        last_date = max((game[4] for game in games), default=None)
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", games)
+            self._db.execute("""
+                INSERT INTO game_seasons VALUES (?, ?, ?, ?)
+                ON CONFLICT (season) DO UPDATE SET complete = excluded.complete,
+                    updated = excluded.updated,
+                    last_date = MAX(COALESCE(last_date, ''), COALESCE(excluded.last_date, ''))""",
+                             (season, int(complete), time.time(), last_date))
+            self._db.commit()
+
+    def seasons(self):
+        """season -> (complete, updated, last game date)"""
+        with self._lock:
+            rows = self._db.execute("SELECT season, complete, updated, last_date FROM game_seasons").fetchall()
+        return {season: (bool(complete), updated, last_date)
+                for season, complete, updated, last_date in rows}
+
+    def series(self, team_id, opponent_id, first_season, last_season):
+        """(game_date, matchup, wl, pts, opponent_pts) rows, newest first."""
+        with self._lock:
+            return self._db.execute("""
+                SELECT game_date, matchup, wl, pts, opponent_pts FROM games
+                WHERE team_id = ? AND opponent_id = ? AND season BETWEEN ? AND ?
+                ORDER BY game_date DESC""", (team_id, opponent_id, first_season, last_season)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
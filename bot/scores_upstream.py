@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import time
+
+import requests
+
+from scores_sessions import unhealthy
+
+
+def host_failure(exc):
+    """Whether a failed request counts against the host's circuit breaker.
+
+    Only timeouts, connection errors and blocked or 5xx responses do; a bad
+    parameter or a missing fixture says nothing about the host.
+    """
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    response = getattr(exc, 'response', None)
+    return isinstance(exc, requests.exceptions.HTTPError) and response is not None \
+        and unhealthy(response.status_code)
+
+
+class Upstream:
+    """The one place endpoint classes are actually constructed, i.e. where
+    requests leave for stats.nba.com / cdn.nba.com.
+
+    ``stats_base_url`` and ``live_base_url`` in the bot config point nba_api at
+    another host, e.g. the fixture server in scores_fixtures. Every call waits
+    its turn with ``scheduler``, which also learns whether the host failed it
+    (``host_failure``), and is timed into ``metrics`` when those are set.
+    ``upstream_timeout`` is the socket timeout handed to nba_api.
+    ``background`` is the executor stale responses are refreshed on.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.metrics = None
+        self.scheduler = None
+        self.background = None
+        self.timeout = float(config.get('upstream_timeout', 10))
+        if config.get('stats_base_url'):
+            from nba_api.stats.library.http import NBAStatsHTTP
+            NBAStatsHTTP.base_url = config['stats_base_url']
+        if config.get('live_base_url'):
+            from nba_api.live.nba.library.http import NBALiveHTTP
+            NBALiveHTTP.base_url = config['live_base_url']
+
+    def breaker(self, endpoint):
+        if self.scheduler is None:
+            return None
+        return self.scheduler.breaker(endpoint)
+
+    def fetch(self, endpoint, params):
+        if self.scheduler is not None:
+            self.scheduler.acquire(endpoint, params)
+        start = time.perf_counter()
+        try:
+            result = self.request(endpoint, params)
+        except Exception as e:
+            self._done(endpoint, start, e)
+            raise
+        self._done(endpoint, start)
+        return result
+
+    def _done(self, endpoint, start, exc=None):
+        if self.metrics is not None:
+            self.metrics.upstream_call(endpoint.__name__, time.perf_counter() - start, exc)
+        if self.scheduler is not None:
+            self.scheduler.record(endpoint, exc is not None and host_failure(exc))
+
+    def request(self, endpoint, params):
+        return endpoint(timeout=self.timeout, **params)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from scores_cache import note_stale, take_stale
+from scores_helpers import ago
+from scores_ratelimit import DOWN_MESSAGE, UpstreamBusy
+
+log = logging.getLogger(__name__)
+
+TIMEOUT_MESSAGE = "upstream timed out"
+WORKERS = 4  # default for ``workers``
+FANOUT = 4  # default for ``fanout``
+
+_running = set()  # commands in flight, the loop only keeps weak references
+
+
+def _collect(func, *args):
+    # commands are generators, drain them on the worker thread so every
+    # blocking call they make happens off the event loop
+    take_stale()  # whatever an earlier job on this thread left behind
+    replies = list(func(*args))
+    age = take_stale()
+    if age is not None and replies:
+        replies[-1] = f"{replies[-1]} (as of {ago(age)} ago)"
+    return replies
+
+
+def _tracking_stale(func):
+    # run on another thread, bring back the age of any stale response it used
+    def run(item):
+        take_stale()
+        result = func(item)
+        return result, take_stale()
+    return run
+
+
+class CommandPool:
+    """Runs blocking command handlers on a bounded thread pool.
+
+    ``workers`` caps how many commands talk to upstream at once and
+    ``command_timeout`` is the deadline (seconds) for a single command; both
+    can be set in the bot config, with ``timeout_<command>`` overriding the
+    deadline for one command. Commands that fetch several things at once use
+    ``map``, which runs on its own pool of ``fanout`` threads so a command
+    never waits on a slot held by another command.
+    """
+
+    def __init__(self, loop, config=None, metrics=None):
+        config = config or {}
+        self.loop = loop
+        self.metrics = metrics
+        self.workers = int(config.get('workers', WORKERS))
+        self.timeout = float(config.get('command_timeout', 15))
+        self.timeouts = {
+            key[len('timeout_'):]: float(value)
+            for key, value in config.items() if key.startswith('timeout_')
+        }
+        self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                           thread_name_prefix='scores')
+        fanout = int(config.get('fanout', FANOUT))
+        self.fanout = ThreadPoolExecutor(max_workers=fanout,
+                                         thread_name_prefix='scores-fanout')
+        self.threads = self.workers + fanout  # most that can be out upstream at once
+
+    def timeout_for(self, name):
+        return self.timeouts.get(name, self.timeout)
+
+    async def run(self, func, *args):
+        start = time.perf_counter()
+        future = self.loop.run_in_executor(
+            self.executor, functools.partial(_collect, func, *args))
+        try:
+            result = await asyncio.wait_for(future, self.timeout_for(func.__name__))
+        except (asyncio.TimeoutError, requests.exceptions.Timeout) as e:
+            # upstream_timeout is usually the shorter of the two
+            self._observe(func, start, e)
+            return [TIMEOUT_MESSAGE]
+        except requests.exceptions.ConnectionError as e:
+            self._observe(func, start, e)
+            return [DOWN_MESSAGE]
+        except UpstreamBusy as e:
+            self._observe(func, start, e)
+            return [str(e)]
+        except Exception as e:
+            self._observe(func, start, e)
+            raise
+        self._observe(func, start)
+        return result
+
+    def _observe(self, func, start, exc=None):
+        if self.metrics is not None:
+            self.metrics.command(func.__name__, time.perf_counter() - start, exc)
+
+    def map(self, func, items):
+        """func over items concurrently, from a worker thread; results in order."""
+        results = []
+        for result, age in self.fanout.map(_tracking_stale(func), items):
+            if age is not None:
+                note_stale(age)
+            results.append(result)
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        self.fanout.shutdown(wait=False)
+
+
+def _finished(task):
+    _running.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.error("command failed", exc_info=task.exception())
+
+
+def offload(func):
+    """Run a generator command on the plugin's CommandPool and hand its
+    replies to the plugin's Outbox. Goes under ``@command``; the command
+    returns straight away, so irc3 doesn't hold a second caller of the same
+    command in the channel back as flooding."""
+
+    async def run(self, mask, target, args):
+        self.outbox.reply(mask, target, await self.workers.run(func, self, mask, target, args))
+
+    @functools.wraps(func)
+    def wrapper(self, mask, target, args):
+        task = self.bot.loop.create_task(run(self, mask, target, args))
+        _running.add(task)
+        task.add_done_callback(_finished)
+    return wrapper
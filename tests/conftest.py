@@ -0,0 +1,16 @@
+import os
+import sys
+
+import docopt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+
+
+def parse_command(meth, line, nick='ripcity'):
+    """docopt args for a command line, built from the docstring the way
+    irc3's command plugin does it."""
+    name, *argv = line.split()
+    doc = [line.strip() for line in meth.__doc__.strip().split('\n')]
+    usage = 'Usage:\n    ' + '\n    '.join(
+        nick + ' ' + line.strip('%%') for line in doc if line.startswith('%%'))
+    return docopt.docopt(usage, [name] + argv, help=False)
@@ -0,0 +1,21 @@
+from scores_cache import DEFAULT_TTLS, HISTORICAL_TTL, TTLPolicy
+
+
+def test_past_season_is_historical():
+    policy = TTLPolicy('2021-22')
+    assert policy.is_historical({'season': '2020-21'})
+    assert policy.ttl_for('LeagueStandings', {'season': '2020-21'}) == HISTORICAL_TTL
+
+
+def test_current_and_future_seasons_are_not_historical():
+    policy = TTLPolicy('2021-22')
+    for season in ('2021-22', '2022-23', '2026-27'):
+        assert not policy.is_historical({'season': season})
+        assert not policy.is_historical({'season_nullable': season})
+    assert policy.ttl_for('LeagueStandings', {'season': '2026-27'}) == DEFAULT_TTLS['LeagueStandings']
+
+
+def test_retired_player_is_historical():
+    policy = TTLPolicy('2021-22', retired_players=[76375])
+    assert policy.is_historical({'player_id': 76375})
+    assert not policy.is_historical({'player_id': 203081})
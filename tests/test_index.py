@@ -0,0 +1,28 @@
+import pytest
+from nba_api.stats.static import teams
+
+from scores_index import TeamIndex
+
+
+@pytest.fixture(scope='module')
+def team_index():
+    return TeamIndex(teams.get_teams())
+
+
+@pytest.mark.parametrize('name, nickname', [
+    ('blazers', 'Trail Blazers'),
+    ('LAL', 'Lakers'),
+    ('Boston Celtics', 'Celtics'),
+    ('blaz', 'Trail Blazers'),
+    ('warr', 'Warriors'),
+    ('mav', 'Mavericks'),
+    ('knick', 'Knicks'),
+    ('golden state', 'Warriors'),
+])
+def test_find(team_index, name, nickname):
+    assert team_index.find(name)['nickname'] == nickname
+
+
+def test_find_nothing(team_index):
+    assert team_index.find('xyzzy') is None
+    assert team_index.find('') is None
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from scores_live import LivePoller
+
+
+class Endpoint:
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def fresh(self, **params):
+        self.calls += 1
+        return self.response
+
+
+def test_live_polls_leave_the_stats_scoreboard_alone():
+    stats = Endpoint(SimpleNamespace(
+        get_normalized_dict=lambda: {'GameHeader': [], 'LineScore': []}))
+    live = Endpoint(SimpleNamespace(games=SimpleNamespace(get_dict=lambda: [])))
+    plugin = SimpleNamespace(
+        bot=SimpleNamespace(loop=None),
+        scoreboard=SimpleNamespace(Scoreboard=stats),
+        live_scoreboard=SimpleNamespace(ScoreBoard=live),
+        team_index=None, player_index=None)
+    poller = LivePoller(plugin, {'idle_poll_interval': '600'})
+    for _ in range(5):
+        poller.refresh()
+    assert (stats.calls, live.calls) == (1, 5)
+    game_date, fetched, scoreboard = poller._header
+    poller._header = (game_date, fetched - 600, scoreboard)
+    poller.refresh()
+    assert (stats.calls, live.calls) == (2, 6)
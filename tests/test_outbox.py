@@ -0,0 +1,34 @@
+import asyncio
+
+from scores_metrics import Metrics
+from scores_outbox import Outbox
+
+
+class Bot:
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.nick = 'ripcity'
+        self.config = {}
+        self.sent = []
+
+    def privmsg(self, target, line, nowait=False):
+        self.sent.append((target, line))
+
+
+class Mask:
+    nick = 'someone'
+
+
+def test_metrics_summary_fits_irc_lines():
+    metrics = Metrics()
+    for n in range(40):
+        metrics.command(f"command{n}", .1)
+        metrics.upstream_call(f"Endpoint{n}", .2)
+    bot = Bot()
+    outbox = Outbox(bot, {'irc_burst': 1000})
+    outbox.reply(Mask(), '#ripcity', metrics.summary())
+    prefix = f":ripcity!ripcity@{'x' * 63} PRIVMSG #ripcity :"
+    assert len(bot.sent) > 2
+    assert all(len((prefix + line).encode()) <= 510 for _, line in bot.sent)
+    bot.loop.close()
@@ -0,0 +1,9 @@
+from scores_sessions import PooledSession
+from scores_workers import CommandPool
+
+
+def test_http_pool_covers_every_thread_that_can_fetch():
+    pool = CommandPool(None, {'workers': '4', 'fanout': '3'})
+    session = PooledSession(pool.threads)
+    assert session.get_adapter('https://stats.nba.com')._pool_maxsize == 7
+    pool.shutdown()
@@ -0,0 +1,28 @@
+from scores_stats import LeagueStats
+
+
+class Response:
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def get_normalized_dict(self):
+        self.calls += 1
+        return {'LeagueDashPlayerStats': self.rows}
+
+
+def row(name, pts):
+    row = dict.fromkeys(('GP', 'MIN', 'PTS', 'REB', 'OREB', 'DREB', 'AST', 'STL', 'BLK',
+                         'TOV', 'FGM', 'FGA', 'FTM', 'FTA', 'FG3M', 'FG3A', 'PLUS_MINUS',
+                         'DD2', 'TD3'), 0)
+    row.update(PLAYER_NAME=name, TEAM_ABBREVIATION='POR', GP=70, PTS=pts)
+    return row
+
+
+def test_built_once_per_response():
+    response = Response([row('Damian Lillard', 2000)])
+    league = LeagueStats.from_response(response)
+    assert LeagueStats.from_response(response) is league
+    assert response.calls == 1
+    assert LeagueStats.from_response(Response([row('CJ McCollum', 1500)])) is not league
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+import requests
+
+from scores_cache import TTLPolicy
+from scores_fixtures import FixtureMissing
+from scores_ratelimit import OutboundScheduler
+from scores_upstream import Upstream, host_failure
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+@pytest.mark.parametrize('exc, failed', [
+    (requests.exceptions.ReadTimeout(), True),
+    (requests.exceptions.ConnectionError(), True),
+    (http_error(503), True),
+    (http_error(429), True),
+    (http_error(400), False),
+    (json.JSONDecodeError('Expecting value', '', 0), False),
+    (FixtureMissing('no fixture'), False),
+])
+def test_host_failure(exc, failed):
+    assert host_failure(exc) is failed
+
+
+class Endpoint:
+    __module__ = 'nba_api.stats.endpoints.fake'
+
+
+def test_bad_requests_leave_the_breaker_closed():
+    class Missing(Upstream):
+        def request(self, endpoint, params):
+            raise FixtureMissing(endpoint.__name__)
+
+    upstream = Missing()
+    upstream.scheduler = OutboundScheduler(TTLPolicy('2021-22'),
+                                           {'rate_stats': '1000', 'burst_stats': '1000'})
+    for _ in range(10):
+        with pytest.raises(FixtureMissing):
+            upstream.fetch(Endpoint, {})
+    assert not upstream.breaker(Endpoint).is_open()
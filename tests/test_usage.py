@@ -0,0 +1,55 @@
+from conftest import parse_command
+from scores_plugin import Plugin
+
+
+def test_headtohead_without_seasons():
+    args = parse_command(Plugin.headtohead, 'headtohead blazers lakers')
+    assert args['<team1>'] == 'blazers'
+    assert args['<team2>'] == 'lakers'
+    assert args['<seasons>'] is None
+
+
+def test_headtohead_with_seasons():
+    args = parse_command(Plugin.headtohead, 'headtohead -s 2010-2021 blazers lakers')
+    assert args['<seasons>'] == '2010-2021'
+    assert (args['<team1>'], args['<team2>']) == ('blazers', 'lakers')
+
+
+def test_leaders_number_without_season():
+    args = parse_command(Plugin.leaders, 'leaders pts -n 5')
+    assert args['<number>'] == '5'
+    assert args['<season>'] is None
+
+
+def test_leaders_season_and_number():
+    args = parse_command(Plugin.leaders, 'leaders ast -s 2020 -n 5')
+    assert (args['<season>'], args['<number>']) == ('2020', '5')
+
+
+def test_leaders_rejects_unknown_season():
+    plugin = Plugin.__new__(Plugin)
+    plugin.CURRENT_SEASON = '2021-22'
+    args = parse_command(Plugin.leaders, 'leaders pts -s x')
+    assert list(Plugin.leaders.__wrapped__(plugin, None, None, args)) == [
+        "Season should look like 2020 or 2020-21."]
+
+
+def test_playbyplay_ignores_a_non_numeric_count():
+    from types import SimpleNamespace
+
+    from nba_api.stats.static import teams
+    from scores_index import TeamIndex
+
+    plugin = Plugin.__new__(Plugin)
+    plugin.team_index = TeamIndex(teams.get_teams())
+    plugin.live = SimpleNamespace(snapshot=lambda: SimpleNamespace(game_for_team=lambda team_id: None))
+    args = parse_command(Plugin.playbyplay, 'playbyplay blazers x')
+    assert list(Plugin.playbyplay.__wrapped__(plugin, None, None, args)) == ["Live game not found."]
+
+
+def test_season_range_stops_at_the_current_season():
+    plugin = Plugin.__new__(Plugin)
+    plugin.CURRENT_SEASON = '2021-22'
+    assert plugin._season_range('2030') == ['2021-22']
+    assert plugin._season_range('2020-2030') == ['2020-21', '2021-22']
+    assert plugin._season_range('2019') == ['2019-20']
@@ -0,0 +1,61 @@
+import asyncio
+
+import requests
+
+from scores_ratelimit import DOWN_MESSAGE
+from scores_workers import TIMEOUT_MESSAGE, CommandPool, offload
+
+
+class Outbox:
+
+    def __init__(self):
+        self.sent = []
+
+    def reply(self, mask, target, replies):
+        self.sent.append((target, replies))
+
+
+class Bot:
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+
+
+class Plugin:
+
+    def __init__(self):
+        self.bot = Bot()
+        self.workers = CommandPool(self.bot.loop)
+        self.outbox = Outbox()
+
+    @offload
+    def echo(self, mask, target, args):
+        yield args
+
+
+def test_offload_returns_at_once_so_irc3_does_not_track_it():
+    plugin = Plugin()
+    assert not asyncio.iscoroutinefunction(Plugin.echo)
+    assert plugin.echo(None, '#c', 'one') is None
+    assert plugin.echo(None, '#c', 'two') is None
+    plugin.bot.loop.run_until_complete(asyncio.sleep(0.2))
+    assert sorted(plugin.outbox.sent) == [('#c', ['one']), ('#c', ['two'])]
+    plugin.workers.shutdown()
+    plugin.bot.loop.close()
+
+
+def test_upstream_errors_get_a_reply():
+    def timeout(plugin, mask, target, args):
+        raise requests.exceptions.ReadTimeout()
+        yield
+
+    def refused(plugin, mask, target, args):
+        raise requests.exceptions.ConnectionError()
+        yield
+
+    loop = asyncio.new_event_loop()
+    pool = CommandPool(loop)
+    assert loop.run_until_complete(pool.run(timeout, None, None, None, None)) == [TIMEOUT_MESSAGE]
+    assert loop.run_until_complete(pool.run(refused, None, None, None, None)) == [DOWN_MESSAGE]
+    pool.shutdown()
+    loop.close()